@@ -0,0 +1,192 @@
+"""
+Benchmark: end-to-end PDFExtractor -> InvoiceParser -> exporter throughput on synthetic 7501s.
+
+Generates a corpus with benchmarks.synthetic_7501 (or reuses one via --corpus), runs every
+file through the pipeline in-process and reports pages/sec, per-stage latency percentiles,
+peak RSS and field-level accuracy against the generated ground truth. Results are written
+as JSON so runs can be compared (--compare previous.json).
+
+Usage (from the project root):
+    python -m benchmarks.pipeline_throughput [--files 50] [--pages 1] [--scanned-ratio 0.2]
+                                             [--engine text|spatial] [--format xlsx]
+                                             [--output results.json] [--compare baseline.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any
+
+from benchmarks import peak_rss_mb, percentile
+from benchmarks.synthetic_7501 import generate_corpus
+
+STAGES = ["extract", "parse", "export"]
+
+
+def _normalize(field: str, value: Any) -> str:
+    text = "" if value is None else str(value).strip()
+    if field == "Total Entered Value":
+        text = text.replace(",", "").replace("$", "")
+    return text
+
+
+def _stage_summary(timings: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(timings),
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+        "max_ms": max(timings) if timings else 0.0,
+        "total_s": sum(timings) / 1000,
+    }
+
+
+def run_pipeline(manifest: List[Dict[str, Any]], out_dir: str, engine: str, fmt: str) -> Dict[str, Any]:
+    from src.extractor import PDFExtractor
+    from src.parser import InvoiceParser
+    from src.exporter import ExcelExporter, with_format_extension
+
+    baseline_rss = peak_rss_mb()
+    extractor = PDFExtractor()
+    parser = InvoiceParser(engine=engine)
+    output_path = with_format_extension(os.path.join(out_dir, "benchmark_output.xlsx"), fmt)
+    writer = ExcelExporter().open_stream(output_path, fmt)
+
+    timings: Dict[str, List[float]] = defaultdict(list)
+    correct: Dict[str, int] = defaultdict(int)
+    scored: Dict[str, int] = defaultdict(int)
+    pages = scanned_pages = 0
+
+    run_start = time.perf_counter()
+    for i, entry in enumerate(manifest, start=1):
+        start = time.perf_counter()
+        elements = extractor.extract_structured_data(entry["path"])
+        timings["extract"].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        data = parser.parse(elements) if elements else {}
+        timings["parse"].append((time.perf_counter() - start) * 1000)
+
+        pages += entry["pages"]
+        if entry["scanned"]:
+            scanned_pages += entry["pages"]
+
+        for field, expected in entry["truth"].items():
+            scored[field] += 1
+            if _normalize(field, data.get(field)) == _normalize(field, expected):
+                correct[field] += 1
+
+        if data:
+            data["id"] = i
+            data["filename"] = os.path.basename(entry["path"])
+            start = time.perf_counter()
+            writer.write(data)
+            timings["export"].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    writer.close()
+    finalize_ms = (time.perf_counter() - start) * 1000
+    elapsed = time.perf_counter() - run_start
+
+    accuracy = {field: correct[field] / scored[field] for field in scored}
+    total_scored = sum(scored.values())
+    return {
+        "files": len(manifest),
+        "pages": pages,
+        "scanned_pages": scanned_pages,
+        "elapsed_s": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "files_per_sec": len(manifest) / elapsed if elapsed else 0.0,
+        "stages": {stage: _stage_summary(timings[stage]) for stage in STAGES},
+        "export_finalize_ms": finalize_ms,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - baseline_rss,
+        "accuracy": accuracy,
+        "overall_accuracy": sum(correct.values()) / total_scored if total_scored else 0.0,
+    }
+
+
+def print_report(result: Dict[str, Any], baseline: Dict[str, Any] = None):
+    r = result["results"]
+    print(f"\n{r['files']} files / {r['pages']} pages ({r['scanned_pages']} scanned) in {r['elapsed_s']:.2f}s")
+    print(f"{'pages/sec':<20} {r['pages_per_sec']:>10.2f}" + _delta(baseline, "pages_per_sec", r))
+    print(f"{'peak RSS MB':<20} {r['peak_rss_mb']:>10.1f}" + _delta(baseline, "peak_rss_mb", r))
+    print(f"{'overall accuracy':<20} {r['overall_accuracy']:>10.2%}" + _delta(baseline, "overall_accuracy", r))
+
+    print(f"\n{'stage':<8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'total s':>9}")
+    for stage in STAGES:
+        s = r["stages"][stage]
+        print(f"{stage:<8} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} "
+              f"{s['max_ms']:>9.2f} {s['total_s']:>9.2f}")
+
+    print(f"\n{'field':<22} {'accuracy':>9}")
+    for field, acc in sorted(r["accuracy"].items(), key=lambda kv: kv[1]):
+        print(f"{field:<22} {acc:>9.2%}")
+
+
+def _delta(baseline, key, r) -> str:
+    if not baseline:
+        return ""
+    before = baseline["results"].get(key)
+    if not before:
+        return ""
+    return f"   ({(r[key] - before) / before:+.1%} vs baseline)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50, help="Number of synthetic entry summaries")
+    parser.add_argument("--pages", type=int, default=1, help="Pages per entry summary")
+    parser.add_argument("--scanned-ratio", type=float, default=0.2, help="Fraction rasterized as scans")
+    parser.add_argument("--seed", type=int, default=7501, help="Corpus seed")
+    parser.add_argument("--corpus", help="Reuse a folder produced by benchmarks.synthetic_7501")
+    parser.add_argument("--engine", choices=["text", "spatial"], default=None,
+                        help="Parser engine (default: PARSER_ENGINE from config)")
+    parser.add_argument("--format", default="xlsx", help="Export format (xlsx, csv, jsonl, parquet)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    from src.config import PARSER_ENGINE
+    engine = args.engine or PARSER_ENGINE
+
+    work_dir = tempfile.mkdtemp(prefix="jarvis_bench_")
+    try:
+        if args.corpus:
+            with open(os.path.join(args.corpus, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        else:
+            print(f"Generating {args.files} synthetic entry summaries...")
+            manifest = generate_corpus(os.path.join(work_dir, "corpus"), args.files, args.pages,
+                                       args.scanned_ratio, args.seed)
+        results = run_pipeline(manifest, work_dir, engine, args.format)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {"files": len(manifest), "pages": args.pages, "scanned_ratio": args.scanned_ratio,
+                   "seed": args.seed, "corpus": args.corpus, "engine": engine, "format": args.format},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
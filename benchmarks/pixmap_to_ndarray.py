@@ -0,0 +1,96 @@
+"""
+Benchmark: page pixmap -> NumPy array conversion for OCR.
+
+Compares the legacy PNG round trip (pix.tobytes("png") -> PIL -> np.array) with the
+raw-buffer view used by PDFExtractor._pixmap_to_array. Each mode runs in its own
+subprocess so peak RSS is measured independently.
+
+Usage (from the project root):
+    python -m benchmarks.pixmap_to_ndarray path/to/scanned.pdf [--pages 10] [--ocr]
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from benchmarks import peak_rss_mb
+
+MODES = ["png", "raw"]
+
+
+def to_array_png(pix) -> np.ndarray:
+    from PIL import Image
+    img = Image.open(io.BytesIO(pix.tobytes("png")))
+    return np.array(img)
+
+
+def to_array_raw(pix) -> np.ndarray:
+    from src.extractor import PDFExtractor
+    return PDFExtractor._pixmap_to_array(pix)
+
+
+def run_mode(mode: str, pdf_path: str, pages: int, with_ocr: bool) -> dict:
+    convert = to_array_png if mode == "png" else to_array_raw
+    reader = None
+    if with_ocr:
+        import easyocr
+        reader = easyocr.Reader(['en'], gpu=False)
+
+    baseline_rss = peak_rss_mb()
+    timings = []
+    doc = fitz.open(pdf_path)
+    page_count = min(pages, len(doc)) if pages else len(doc)
+    for page_num in range(page_count):
+        start = time.perf_counter()
+        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(2.0, 2.0), colorspace=fitz.csGRAY)
+        img_array = convert(pix)
+        if reader is not None:
+            reader.readtext(img_array, detail=1)
+        timings.append((time.perf_counter() - start) * 1000)
+        del img_array, pix
+    doc.close()
+
+    return {
+        "mode": mode,
+        "pages": page_count,
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)],
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - baseline_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", help="PDF to rasterize (scanned packets give the most realistic numbers)")
+    parser.add_argument("--pages", type=int, default=0, help="Limit to the first N pages (0 = all)")
+    parser.add_argument("--ocr", action="store_true", help="Include EasyOCR recognition in the timing")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)  # internal: child process
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.pdf, args.pages, args.ocr)))
+        return
+
+    results = []
+    for mode in MODES:
+        cmd = [sys.executable, "-m", "benchmarks.pixmap_to_ndarray", args.pdf,
+               "--pages", str(args.pages), "--mode", mode] + (["--ocr"] if args.ocr else [])
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=os.getcwd())
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'mode':<6} {'pages':>6} {'mean ms/page':>13} {'p95 ms':>8} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['pages']:>6} {r['mean_ms']:>13.2f} {r['p95_ms']:>8.2f} "
+              f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
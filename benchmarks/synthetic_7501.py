@@ -0,0 +1,212 @@
+"""
+Synthetic CBP 7501 (Entry Summary) generator with known field values.
+
+Draws a simplified 7501 layout with reportlab (digital, with a text layer) and can
+rasterize it through PyMuPDF into an image-only PDF (scanned). Every generated file
+comes with the values InvoiceParser is expected to return for it, so benchmarks can
+score field-level accuracy.
+
+Usage (from the project root):
+    python -m benchmarks.synthetic_7501 out_dir [--files 50] [--pages 1] [--scanned-ratio 0.2] [--seed 7501]
+"""
+import os
+import json
+import random
+import argparse
+from datetime import date, timedelta
+from typing import List, Dict, Any, Tuple
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US letter, points
+FONT_SIZE = 8
+SCAN_DPI = 150
+
+COUNTRIES = ["CN", "VN", "MX", "DE", "IN", "TW", "KR", "JP", "IT", "CA"]
+DESCRIPTIONS = ["PLASTIC TOYS", "COTTON T-SHIRTS", "STEEL BOLTS", "LED LAMPS", "CERAMIC TILES",
+                "LEATHER BAGS", "AUDIO CABLES", "GLASS JARS", "WOODEN CHAIRS", "RUBBER HOSES"]
+
+# Line (x, y, text) in PyMuPDF page coordinates (origin top-left)
+Line = Tuple[float, float, str]
+
+# Left-column text beside boxes 37-40; long enough to keep each amount out of the previous label's window
+DECLARATION = [
+    "36. DECLARATION OF IMPORTER OF RECORD (OWNER OR PURCHASER)",
+    "OR AUTHORIZED AGENT I declare that I am the importer of record",
+    "and that the actual owner, purchaser, or consignee for CBP purposes",
+    "is as shown above, OR owner or purchaser or agent thereof.",
+]
+
+
+def _fmt_date(d: date) -> str:
+    return d.strftime("%m/%d/%Y")
+
+
+def random_truth(rng: random.Random, index: int) -> Dict[str, str]:
+    """
+    Random field values for one entry, keyed like InvoiceParser's output.
+    """
+    export_date = date(2024, 1, 1) + timedelta(days=rng.randrange(300))
+    import_date = export_date + timedelta(days=rng.randrange(5, 30))
+    entry_date = import_date + timedelta(days=rng.randrange(0, 3))
+    summary_date = entry_date + timedelta(days=rng.randrange(1, 10))
+
+    entered_value = rng.randrange(1_000, 2_000_000)
+    duty = round(entered_value * rng.choice([0.0, 0.025, 0.05, 0.075]), 2)
+    tax = round(rng.uniform(0, 400), 2)
+    other = round(entered_value * 0.003464, 2)  # MPF-like fee
+    total = round(duty + tax + other, 2)
+
+    return {
+        "Country of Origin": rng.choice(COUNTRIES),
+        "Exporting Country": rng.choice(COUNTRIES),
+        "Waybill Number": f"{rng.randrange(100, 1000)}-{rng.randrange(10_000_000, 100_000_000)}",
+        "Summary Date": _fmt_date(summary_date),
+        "Entry Date": _fmt_date(entry_date),
+        "Import Date": _fmt_date(import_date),
+        "Export Date": _fmt_date(export_date),
+        "Total Entered Value": str(entered_value),
+        "Duty": f"{duty:.2f}",
+        "Tax": f"{tax:.2f}",
+        "Other": f"{other:.2f}",
+        "Total": f"{total:.2f}",
+        "Invoice Number": f"INV-{index:05d}{rng.randrange(100, 1000)}",
+    }
+
+
+def _header(truth: Dict[str, str]) -> List[Line]:
+    return [
+        (36, 60, "1. Filer Code/Entry No. EK4-1234567-8"), (250, 60, "2. Entry Type ABI/A"),
+        (430, 60, f"3. Summary Date {truth['Summary Date']}"),
+        (36, 90, "4. Surety No. 457"), (130, 90, "5. Bond Type 8"), (250, 90, "6. Port Code 2704"),
+        (430, 90, f"7. Entry Date {truth['Entry Date']}"),
+        (36, 120, "8. Importing Carrier MAERSK"), (150, 120, "9. Mode of Transport VESSEL"),
+        (290, 120, f"10. Country of Origin {truth['Country of Origin']}"),
+        (430, 120, f"11. Import Date {truth['Import Date']}"),
+        (36, 150, f"12. B/L or AWB No. {truth['Waybill Number']}"),
+        (180, 150, "13. Manufacturer ID XXACMTOY123SHE"),
+        (290, 150, f"14. Exporting Country {truth['Exporting Country']}"),
+        (430, 150, f"15. Export Date {truth['Export Date']}"),
+        (36, 190, "25. Ultimate Consignee Name and Address"), (320, 190, "26. Importer of Record Name and Address"),
+        (36, 202, "ACME IMPORTS LLC"), (320, 202, "ACME IMPORTS LLC"),
+        (36, 214, "100 HARBOR WAY, LONG BEACH CA"), (320, 214, "100 HARBOR WAY, LONG BEACH CA"),
+    ]
+
+
+def _line_items(truth: Dict[str, str], rng: random.Random, first: bool) -> List[Line]:
+    lines: List[Line] = [
+        (36, 250, "27. Line No."), (90, 250, "28. Description of Merchandise"),
+        (300, 250, "32. Entered Value"), (400, 250, "33. HTSUS Rate"), (480, 250, "34. Duty and I.R. Tax"),
+    ]
+    for row in range(8):
+        y = 270 + row * 30
+        description = rng.choice(DESCRIPTIONS)
+        if first and row == 0:
+            description += f" Invoice No: {truth['Invoice Number']}"
+        lines += [
+            (36, y, f"{row + 1:03d}"),
+            (90, y, description),
+            (300, y, f"{rng.randrange(100, 99_999):,}"),
+            (400, y, "FREE"),
+        ]
+    return lines
+
+
+def _totals(truth: Dict[str, str]) -> List[Line]:
+    lines: List[Line] = [
+        (36, 600, f"35. Total Entered Value $ {int(truth['Total Entered Value']):,}"),
+        (330, 600, "CBP USE ONLY"),
+    ]
+    for row, (label, field) in enumerate([("37. Duty", "Duty"), ("38. Tax", "Tax"),
+                                          ("39. Other", "Other"), ("40. Total", "Total")]):
+        y = 630 + row * 24
+        lines += [(36, y, DECLARATION[row]), (430, y, f"{label} {truth[field]}")]
+    lines.append((36, 750, "CBP Form 7501 (5/09)"))
+    return lines
+
+
+def page_layouts(truth: Dict[str, str], pages: int, rng: random.Random) -> List[List[Line]]:
+    """
+    Lines per page: the header on the first page, line items on every page and
+    the totals (boxes 35-40) on the last one, as on a multi-page entry summary.
+    """
+    layouts = []
+    for page in range(max(1, pages)):
+        lines = _header(truth) if page == 0 else [(36, 60, "ENTRY SUMMARY CONTINUATION SHEET")]
+        lines += _line_items(truth, rng, first=page == 0)
+        if page == pages - 1 or pages <= 1:
+            lines += _totals(truth)
+        layouts.append(lines)
+    return layouts
+
+
+def render_digital(pdf_path: str, layouts: List[List[Line]]):
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(pdf_path, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    for lines in layouts:
+        c.setFont("Helvetica", FONT_SIZE)
+        for x, y, text in lines:
+            # reportlab's origin is bottom-left; y is the text baseline
+            c.drawString(x, PAGE_HEIGHT - y - FONT_SIZE, text)
+        c.showPage()
+    c.save()
+
+
+def rasterize(src_path: str, dst_path: str, dpi: int = SCAN_DPI):
+    """
+    Rewrites a PDF as grayscale page images without a text layer (a "scanned" copy).
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(src_path) as src, fitz.open() as dst:
+        for page in src:
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            out = dst.new_page(width=page.rect.width, height=page.rect.height)
+            out.insert_image(out.rect, pixmap=pix)
+        dst.save(dst_path, deflate=True)
+
+
+def generate_corpus(out_dir: str, files: int, pages: int = 1, scanned_ratio: float = 0.0,
+                    seed: int = 7501) -> List[Dict[str, Any]]:
+    """
+    Writes `files` synthetic entry summaries into out_dir plus a manifest.json.
+    Returns the manifest: [{"path", "pages", "scanned", "truth"}].
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    scanned_count = int(round(files * scanned_ratio))
+    manifest = []
+
+    for index in range(files):
+        truth = random_truth(rng, index)
+        scanned = index < scanned_count
+        pdf_path = os.path.join(out_dir, f"entry_{index:05d}{'_scan' if scanned else ''}.pdf")
+        layouts = page_layouts(truth, pages, rng)
+        if scanned:
+            digital_path = pdf_path + ".digital"
+            render_digital(digital_path, layouts)
+            rasterize(digital_path, pdf_path)
+            os.remove(digital_path)
+        else:
+            render_digital(pdf_path, layouts)
+        manifest.append({"path": pdf_path, "pages": len(layouts), "scanned": scanned, "truth": truth})
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", help="Folder to write the PDFs and manifest.json into")
+    parser.add_argument("--files", type=int, default=50, help="Number of entry summaries")
+    parser.add_argument("--pages", type=int, default=1, help="Pages per entry summary")
+    parser.add_argument("--scanned-ratio", type=float, default=0.2, help="Fraction rasterized as scans")
+    parser.add_argument("--seed", type=int, default=7501, help="Random seed (same seed, same corpus)")
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.out_dir, args.files, args.pages, args.scanned_ratio, args.seed)
+    print(f"Wrote {len(manifest)} PDFs to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,20 +10,36 @@ os.environ["PYTHONOPTIMIZE"] = "1"
 os.environ["PYINSTALLER_STRICT_UNPACK_DELAY"] = "1" 
 
 import glob
+import time
 from typing import List, Dict, Any
+from loguru import logger
 
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QPushButton, QLabel, QFileDialog, 
-                               QTableWidget, QTableWidgetItem, QProgressBar, 
+                               QTableView, QProgressBar, 
                                QHeaderView, QMessageBox, QTabWidget, QStyle, QFrame,
-                               QLineEdit)
-from PySide6.QtCore import Qt, QThread, Signal, Slot
-from PySide6.QtGui import QFont, QIcon
+                               QLineEdit, QCheckBox)
+from PySide6.QtCore import Qt, QThread, QTimer, Signal, Slot
+from PySide6.QtGui import QFont, QIcon, QKeySequence, QShortcut
 
 # from src.extractor import PDFExtractor  # Moved to lazy loading in worker
 # from src.parser import InvoiceParser     # Moved to lazy loading in worker
 # from src.exporter import ExcelExporter   # Moved to lazy loading in worker
-from src.config import OUTPUT_FILENAME
+from src.table_model import InvoiceTableModel, InvoiceProxyModel
+from src.dedupe import DuplicateIndex
+from src.search import SearchIndex
+from src.config import (OUTPUT_FILENAME, POOL_WORKERS, CACHE_ENABLED, CACHE_FILENAME, EXPORT_STREAMING,
+                        EXPORT_FORMAT, JOURNAL_ENABLED, JOURNAL_FILENAME, UI_BATCH_MAX_ROWS,
+                        UI_BATCH_INTERVAL_MS, DAEMON_ENABLED, METRICS_ENABLED, METRICS_FILENAME,
+                        METRICS_SHOW_IN_GUI, PROFILE_DIRNAME, ASYNC_INGEST)
+
+# Save-dialog filters per export format (mirrors src.exporter.EXPORT_FORMATS without importing pandas)
+EXPORT_FILTERS = {
+    "xlsx": "Excel Files (*.xlsx)",
+    "csv": "CSV Files (*.csv)",
+    "jsonl": "JSON Lines Files (*.jsonl)",
+    "parquet": "Parquet Files (*.parquet)",
+}
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -42,70 +58,180 @@ class ProcessingWorker(QThread):
     so the UI doesn't freeze.
     """
     progress_update = Signal(int, int) # current, total
-    file_processed = Signal(dict)      # data of the processed file
-    finished = Signal(str)             # output path
+    files_processed = Signal(list)     # batch of processed file records
+    metrics_ready = Signal(dict)       # run summary from src.metrics
+    finished = Signal(str)             # where the results were saved (output path, or the part files)
     error_occurred = Signal(str)
 
-    def __init__(self, input_dir, output_dir):
+    def __init__(self, input_dir, output_dir, workers=POOL_WORKERS, profile=False, watch=False):
         super().__init__()
         self.input_dir = input_dir
         self.output_dir = output_dir
+        self.workers = workers
+        self.profile = profile
+        # Keep polling the folder for new PDFs until stopped (see src.watcher)
+        self.watch = watch
         self.is_running = True
 
     def run(self):
+        # Released in the finally block, also when a file or the export fails
+        cache = journal = daemon = writer = None
+        writer_open = False
         try:
-            pdf_files = glob.glob(os.path.join(self.input_dir, "*.pdf"))
+            pdf_files = sorted(glob.glob(os.path.join(self.input_dir, "*.pdf")))
             total_files = len(pdf_files)
             
-            if total_files == 0:
+            if total_files == 0 and not self.watch:
                 self.error_occurred.emit("No PDF files found in the selected directory.")
                 return
 
             # Lazy loading heavy modules inside the thread
-            from src.extractor import PDFExtractor
-            from src.parser import InvoiceParser
-            from src.exporter import ExcelExporter
-
-            extractor = PDFExtractor()
-            parser = InvoiceParser()
+            from src.pool import ExtractionPool
+            from src.async_ingest import AsyncExtractionPool
+            from src.exporter import ExcelExporter, with_format_extension
+            from src.cache import ResultCache
+            from src.journal import RunJournal
+            from src.daemon import connect_daemon
+            from src.metrics import metrics
+            from src.profiling import FileProfiler
+            from src.watcher import FolderWatcher, WatchState, open_batch_writer
+            from src.pipeline import Pipeline
+
+            metrics.reset()
+            run_start = time.perf_counter()
+
+            # Profiling re-extracts every file, so the cache is bypassed
+            cache = ResultCache(os.path.join(self.output_dir, CACHE_FILENAME)) if CACHE_ENABLED and not self.profile else None
+            # Resumes an interrupted run over this folder without re-extracting its files
+            # (watch mode never completes a run, so it keeps no checkpoint; profiling must measure every file)
+            journal = None
+            if JOURNAL_ENABLED and not self.watch and not self.profile:
+                journal = RunJournal(os.path.join(self.output_dir, JOURNAL_FILENAME))
+            # A running extraction daemon already has the OCR model loaded; fall back to local extraction
+            daemon = connect_daemon() if DAEMON_ENABLED else None
+            profiler = FileProfiler(os.path.join(self.output_dir, PROFILE_DIRNAME)) if self.profile else None
+            # Async ingest overlaps file reads with extraction (slow network shares)
+            pool_cls = AsyncExtractionPool if ASYNC_INGEST else ExtractionPool
+            pool = pool_cls(workers=self.workers, cache=cache, journal=journal, daemon=daemon,
+                            profiler=profiler)
+            # Duplicates are checked on the UI side, where they are reported in the status bar
+            pipeline = Pipeline(pool)
             exporter = ExcelExporter()
+            output_path = with_format_extension(os.path.join(self.output_dir, OUTPUT_FILENAME), EXPORT_FORMAT)
+            
+            watcher = watch_state = None
+            if self.watch:
+                # Files exported by an earlier session are skipped and their ids are not reused
+                watch_state = WatchState(output_path)
+                watcher = FolderWatcher(self.input_dir, processed=watch_state.signatures(self.input_dir))
             
             extracted_data = []
+            # Streaming mode writes each row as it arrives instead of collecting extracted_data
+            # (watch mode opens a writer per batch of new files instead)
+            writer = exporter.open_stream(output_path) if EXPORT_STREAMING and not watcher else None
+            writer_open = writer is not None
+            exported = False
+            # Files actually written in watch mode (xlsx/parquet batches go to timestamped part files)
+            saved_paths = []
             
-            for i, pdf_path in enumerate(pdf_files, start=1):
-                if not self.is_running:
-                    break
-                
-                filename = os.path.basename(pdf_path)
-                
-                try:
-                    # Extract Structured Data (Spatial)
-                    structured_data = extractor.extract_structured_data(pdf_path)
-                    if structured_data:
-                        # Parse
-                        data = parser.parse(structured_data)
-                        data['id'] = i
-                        data['filename'] = filename
-                        
-                        extracted_data.append(data)
-                        self.file_processed.emit(data)
-                except Exception as file_error:
-                    # Log error but continue
-                    print(f"Error processing {filename}: {str(file_error)}")
-                    # Optionally emit a specific error signal if you want to show a log in UI
-                
-                self.progress_update.emit(i, total_files)
+            # Rows are emitted in batches (by count or time window) instead of one signal per file
+            batch = []
+            last_flush = time.monotonic()
+            done = 0
+
+            def flush():
+                nonlocal batch, last_flush
+                if batch:
+                    self.files_processed.emit(batch)
+                    batch = []
+                self.progress_update.emit(done, total_files)
+                last_flush = time.monotonic()
+
+            # One pass over the folder, or every batch of new/changed files while watching
+            file_batches = watcher.watch(should_stop=lambda: not self.is_running) if watcher else [pdf_files]
+            for files in file_batches:
+                first_id = 1
+                if watcher:
+                    total_files = done + len(files)
+                    # Edited files: their earlier row is removed so the new one replaces it
+                    watch_state.replace(files)
+                    # Appended (csv/jsonl) or saved as a part file (xlsx/parquet)
+                    writer = open_batch_writer(exporter, output_path)
+                    writer_open = True
+                    first_id = watch_state.next_id
+
+                # Results come back in input order, so ids match the file order
+                results = pipeline.run(files, writer=writer, should_stop=lambda: not self.is_running,
+                                       first_id=first_id)
+                batch_results = []
+                for pdf_path, record, stats in results:
+                    batch_results.append((pdf_path, stats))
+                    # Failed/empty files are logged by the pipeline; the run carries on
+                    if record is not None:
+                        if writer is None:
+                            extracted_data.append(record)
+                        batch.append(record)
+                    
+                    done += 1
+                    if (len(batch) >= UI_BATCH_MAX_ROWS
+                            or (time.monotonic() - last_flush) * 1000 >= UI_BATCH_INTERVAL_MS):
+                        flush()
+                flush()
+                if watcher:
+                    writer_open = False
+                    if writer.close() > 0:
+                        exported = True
+                        if writer.output_path not in saved_paths:
+                            saved_paths.append(writer.output_path)
+                    watch_state.record(batch_results, watcher.processed, writer.output_path)
+
+            if profiler:
+                profiler.report()
 
             # Export
-            if extracted_data:
-                output_path = os.path.join(self.output_dir, OUTPUT_FILENAME)
+            if not watcher:
+                writer_open = False
+                exported = bool(writer and writer.close())
+            if not exported and extracted_data:
                 exporter.export(extracted_data, output_path)
-                self.finished.emit(output_path)
+                exported = True
+
+            # Only once the results are saved: if the export fails (e.g. the file is open in Excel)
+            # the checkpoint must survive. Stopped early, it is kept so the next run picks up from here
+            if journal and self.is_running:
+                journal.finish()
+                journal = None
+
+            if METRICS_ENABLED:
+                self.metrics_ready.emit(metrics.write(os.path.join(self.output_dir, METRICS_FILENAME),
+                                                      time.perf_counter() - run_start))
+
+            if exported:
+                self.finished.emit(self._saved_location(saved_paths) if saved_paths else output_path)
             else:
                 self.error_occurred.emit("No data was extracted from the files.")
 
         except Exception as e:
             self.error_occurred.emit(str(e))
+        finally:
+            if writer_open:
+                try:
+                    writer.close()
+                except Exception as e:
+                    logger.warning(f"Could not save partial results: {e}")
+            if journal:
+                journal.close()
+            if cache:
+                cache.close()
+            if daemon:
+                daemon.close()
+
+    @staticmethod
+    def _saved_location(paths):
+        """The saved file, a short list of part files, or their folder when there are many."""
+        if len(paths) <= 3:
+            return "\n".join(paths)
+        return f"{os.path.dirname(paths[0])} ({len(paths)} part files)"
 
     def stop(self):
         self.is_running = False
@@ -175,6 +301,12 @@ class InvoiceApp(QMainWindow):
                 background-color: #151B27;
             }
             
+            QCheckBox {
+                color: #94A3B8;
+                font-weight: 600;
+                spacing: 6px;
+            }
+            
             /* Professional Dashboard Buttons */
             QPushButton {
                 padding: 10px 20px;
@@ -229,7 +361,7 @@ class InvoiceApp(QMainWindow):
             }
 
             /* Data Table - The "Ghost Grid" Look */
-            QTableWidget {
+            QTableView {
                 background-color: #151B27;
                 border: 1px solid #2A3241;
                 border-radius: 12px;
@@ -249,11 +381,11 @@ class InvoiceApp(QMainWindow):
                 font-size: 11px;
                 letter-spacing: 1.5px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 12px;
                 border-bottom: 1px solid #1E293B;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 border-left: 3px solid #0078FF;
                 background-color: rgba(0, 120, 255, 0.1);
             }
@@ -358,6 +490,10 @@ class InvoiceApp(QMainWindow):
         control_layout.addStretch()
         
         # Action Buttons
+        self.chk_watch = QCheckBox("Watch Folder")
+        self.chk_watch.setToolTip("Keep running and process new PDFs as they are dropped into the folder")
+        self.chk_watch.setCursor(Qt.PointingHandCursor)
+
         self.btn_start = QPushButton("Start Processing")
         self.btn_start.setObjectName("BtnStart")
         self.btn_start.setCursor(Qt.PointingHandCursor)
@@ -380,6 +516,7 @@ class InvoiceApp(QMainWindow):
         self.btn_export.clicked.connect(self.export_data)
         self.btn_export.setEnabled(False)
 
+        control_layout.addWidget(self.chk_watch)
         control_layout.addWidget(self.btn_start)
         control_layout.addWidget(self.btn_stop)
         control_layout.addWidget(self.btn_export)
@@ -389,9 +526,14 @@ class InvoiceApp(QMainWindow):
         # --- Search Bar Section ---
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search invoices (e.g. vendor name, ID, amount)...")
+        self.search_input.setPlaceholderText("Search invoices (e.g. INV-1234, country:CN total>1000)...")
         self.search_input.setClearButtonEnabled(True)
-        self.search_input.textChanged.connect(self.filter_table)
+        # Debounced: filter once typing pauses instead of on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.filter_table)
+        self.search_input.textChanged.connect(self.search_timer.start)
         self.search_input.setMinimumWidth(400)
         self.search_input.setEnabled(False) # Enable only after processing
         
@@ -440,28 +582,46 @@ class InvoiceApp(QMainWindow):
         card_total, self.lbl_total_val = create_stat_card("Total PDFs", "#FFFFFF")
         card_proc, self.lbl_proc_val = create_stat_card("Processed", "#10B981")
         card_rem, self.lbl_rem_val = create_stat_card("Remaining", "#3B82F6")
+        card_rate, self.lbl_rate_val = create_stat_card("Pages / Sec", "#F59E0B")
         
         stats_layout.addWidget(card_total)
         stats_layout.addWidget(card_proc)
         stats_layout.addWidget(card_rem)
+        stats_layout.addWidget(card_rate)
+        self.card_rate = card_rate
+        card_rate.setVisible(METRICS_SHOW_IN_GUI)
         stats_layout.addStretch()
         
         content_layout.addWidget(stats_frame)
 
         # --- 4. Data View Section ---
         
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["ID", "Invoice No", "Date", "Total", "Filename"])
+        # Internal State - Ensure all demanded columns are here by default
+        self.all_columns = [
+            "id", "filename", "Invoice Number", "Waybill Number", 
+            "Summary Date", "Entry Date", "Import Date", "Export Date", 
+            "Country of Origin", "Exporting Country", 
+            "Duty", "Tax", "Other", "Total", "Total Entered Value"
+        ]
+
+        # Table (virtualized: the model holds the rows, the view only paints visible cells)
+        self.model = InvoiceTableModel(self.all_columns, self)
+        self.proxy = InvoiceProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.verticalHeader().setVisible(False)
         self.table.setShowGrid(False) # Clean modern look
         self.table.setAlternatingRowColors(False) # Handle via item CSS
         self.table.setFrameShape(QFrame.NoFrame)
         
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        # Interactive sizing: ResizeToContents would measure every row on each insert
+        header.setSectionResizeMode(QHeaderView.Interactive)
         header.setStretchLastSection(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder) # Keep arrival order until a header is clicked
+        self.table.setSortingEnabled(True)
         
         content_layout.addWidget(self.table)
         
@@ -476,19 +636,11 @@ class InvoiceApp(QMainWindow):
         # Internal State
         self.input_folder = None
         self.worker = None
-        # Internal State - Ensure all demanded columns are here by default
-        self.all_columns = [
-            "id", "filename", "Invoice Number", "Waybill Number", 
-            "Summary Date", "Entry Date", "Import Date", "Export Date", 
-            "Country of Origin", "Exporting Country", 
-            "Duty", "Tax", "Other", "Total", "Total Entered Value"
-        ]
-        self.all_data = [] 
-
-        # Initialize Table Headers
-        self.table.setColumnCount(len(self.all_columns))
-        headers = [c.replace("_", " ").title() for c in self.all_columns]
-        self.table.setHorizontalHeaderLabels(headers)
+        self.duplicates = DuplicateIndex()
+        self.search_index = SearchIndex()
+        # Hidden diagnostics toggle: profile the next run (see src.profiling)
+        self.profile_enabled = False
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, activated=self.toggle_profiling)
 
     def browse_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Invoice Folder")
@@ -523,13 +675,13 @@ class InvoiceApp(QMainWindow):
         self.lbl_total_val.setText("0")
         self.lbl_proc_val.setText("0")
         self.lbl_rem_val.setText("0")
+        self.lbl_rate_val.setText("0")
         
         # Clear Data
-        self.table.setRowCount(0)
-        self.all_data = [] 
-        self.table.setColumnCount(len(self.all_columns))
-        headers = [c.replace("_", " ").title() for c in self.all_columns]
-        self.table.setHorizontalHeaderLabels(headers)
+        self.duplicates.clear()
+        self.search_index.clear()
+        self.proxy.set_row_filter(None)
+        self.model.clear()
         
         self.status_label.setText(" System Ready")
 
@@ -538,11 +690,10 @@ class InvoiceApp(QMainWindow):
             return
 
         # Reset UI
-        self.table.setRowCount(0)
-        self.table.setColumnCount(len(self.all_columns))
-        headers = [c.replace("_", " ").title() for c in self.all_columns]
-        self.table.setHorizontalHeaderLabels(headers)
-        self.all_data = [] 
+        self.duplicates.clear()
+        self.search_index.clear()
+        self.proxy.set_row_filter(None)
+        self.model.clear()
         self.btn_start.setEnabled(False)
         self.btn_browse.setEnabled(False)
         self.btn_export.setEnabled(False)
@@ -555,6 +706,7 @@ class InvoiceApp(QMainWindow):
         self.lbl_total_val.setText(str(total))
         self.lbl_proc_val.setText("0")
         self.lbl_rem_val.setText(str(total))
+        self.lbl_rate_val.setText("0")
         
         self.status_label.setText(" Processing...")
         self.btn_stop.show()
@@ -562,10 +714,13 @@ class InvoiceApp(QMainWindow):
 
         # Start Worker
         output_dir = os.path.join(self.input_folder, "output")
-        self.worker = ProcessingWorker(self.input_folder, output_dir)
+        self.chk_watch.setEnabled(False)
+        self.worker = ProcessingWorker(self.input_folder, output_dir, profile=self.profile_enabled,
+                                       watch=self.chk_watch.isChecked())
         
         self.worker.progress_update.connect(self.update_progress)
-        self.worker.file_processed.connect(self.add_table_row)
+        self.worker.files_processed.connect(self.add_table_rows)
+        self.worker.metrics_ready.connect(self.show_metrics)
         self.worker.finished.connect(self.processing_finished)
         self.worker.error_occurred.connect(self.processing_error)
         
@@ -575,49 +730,62 @@ class InvoiceApp(QMainWindow):
     def update_progress(self, current, total):
         self.status_label.setText(f" Status: Processing {current} of {total} total files...")
         
-        # Update Dashboard Values
+        # Update Dashboard Values (the total grows as files arrive in watch mode)
+        self.lbl_total_val.setText(str(total))
         self.lbl_proc_val.setText(str(current))
         self.lbl_rem_val.setText(str(total - current))
 
-    @Slot(dict)
-    def add_table_row(self, data):
-        # --- 1. Duplicate Invoices Check (Exact Content) ---
-        # Strip metadata to compare pure invoice data
-        new_record_clean = {k: v for k, v in data.items() if k not in ['id', 'filename']}
-        
-        for existing in self.all_data:
-            existing_clean = {k: v for k, v in existing.items() if k not in ['id', 'filename']}
-            if new_record_clean == existing_clean:
-                # Exact duplicate found, skip adding to results
-                current_status = self.status_label.text()
-                if "Duplicates detected" not in current_status:
-                    self.status_label.setText(current_status + " (Duplicates detected & grouped)")
-                return
+    @Slot(list)
+    def add_table_rows(self, batch):
+        """Applies one worker batch to the table with a single insert notification."""
+        rows = []
+        last_duplicate = None
+        for data in batch:
+            # --- 1. Duplicate Invoices Check (hash index, excludes id/filename) ---
+            original = self.duplicates.check(data)
+            if original is not None:
+                # Duplicate found, skip adding to results
+                last_duplicate = (data.get('filename', ''), original)
+                continue
+            rows.append(data)
+
+        if last_duplicate:
+            current_status = self.status_label.text().split(" (Duplicate")[0]
+            self.status_label.setText(current_status + f" (Duplicate: {last_duplicate[0]} matches {last_duplicate[1]})")
+
+        if not rows:
+            return
 
-        # --- 2. Store and Display Unique Data ---
-        self.all_data.append(data)
-
-        # 1. Update Columns if new keys found
-        new_keys = [k for k in data.keys() if k not in self.all_columns]
-        if new_keys:
-            self.all_columns.extend(new_keys)
-            self.table.setColumnCount(len(self.all_columns))
-            # Nicer headers
-            headers = [c.replace("_", " ").title() for c in self.all_columns]
-            self.table.setHorizontalHeaderLabels(headers)
-        
-        # 2. Add Row
-        row_idx = self.table.rowCount()
-        self.table.insertRow(row_idx)
-        
-        for col_idx, key in enumerate(self.all_columns):
-            val = str(data.get(key, ""))
-            self.table.setItem(row_idx, col_idx, QTableWidgetItem(val))
-            
+        # --- 2. Append Unique Data ---
+        first_row = self.model.rowCount()
+        self.model.append_records(rows)
+        # Index as rows arrive so searching never rescans the table
+        for offset, record in enumerate(rows):
+            self.search_index.add(first_row + offset, record)
         self.table.scrollToBottom()
 
+    def toggle_profiling(self):
+        self.profile_enabled = not self.profile_enabled
+        state = "ON - reports go to output/" + PROFILE_DIRNAME if self.profile_enabled else "OFF"
+        self.status_label.setText(f" Profiling {state}")
+
+    @Slot(dict)
+    def show_metrics(self, summary):
+        if not METRICS_SHOW_IN_GUI:
+            return
+        self.lbl_rate_val.setText(f"{summary.get('pages_per_sec', 0):.1f}")
+        # Stage breakdown on hover, slowest first
+        counters = summary.get("counters", {})
+        lines = [f"Digital pages: {int(counters.get('pages.digital', 0))}",
+                 f"OCR pages: {int(counters.get('pages.ocr', 0))}"]
+        for name, t in sorted(summary.get("timers", {}).items(), key=lambda kv: kv[1]["total_s"], reverse=True):
+            lines.append(f"{name}: {t['total_s']:.2f}s ({t['count']}x)")
+        self.card_rate.setToolTip("\n".join(lines))
+
     @Slot(str)
     def processing_finished(self, output_path):
+        self.chk_watch.setEnabled(True)
+        self.table.resizeColumnsToContents()
         self.status_label.setText(" Analysis Complete")
         self.btn_start.show()
         self.btn_start.setEnabled(True)
@@ -641,6 +809,7 @@ class InvoiceApp(QMainWindow):
 
     @Slot(str)
     def processing_error(self, error_msg):
+        self.chk_watch.setEnabled(True)
         self.status_label.setText(" Error")
         self.btn_start.show()
         self.btn_start.setEnabled(True)
@@ -656,17 +825,21 @@ class InvoiceApp(QMainWindow):
             QMessageBox.critical(self, "System Error", error_msg)
 
     def export_data(self):
-        if not self.all_data:
+        if self.model.rowCount() == 0:
             QMessageBox.warning(self, "No Data", "No data to export.")
             return
             
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Excel File", "", "Excel Files (*.xlsx)")
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Export File", "", ";;".join(EXPORT_FILTERS.values()), EXPORT_FILTERS[EXPORT_FORMAT])
         if file_path:
             try:
                 # Lazy loading to keep main thread fast at startup
-                from src.exporter import ExcelExporter
+                from src.exporter import ExcelExporter, with_format_extension
+                fmt = next((f for f, flt in EXPORT_FILTERS.items() if flt == selected_filter), "xlsx")
+                if not file_path.lower().endswith("." + fmt):
+                    file_path = with_format_extension(file_path, fmt)
                 exporter = ExcelExporter()
-                exporter.export(self.all_data, file_path)
+                exporter.export(self.model.records(), file_path, fmt)
                 QMessageBox.information(self, "Success", f"Successfully exported data to:\n{file_path}")
             except PermissionError:
                 QMessageBox.warning(self, "Export Failed", 
@@ -676,28 +849,23 @@ class InvoiceApp(QMainWindow):
                 QMessageBox.critical(self, "Export Failed", f"An unexpected error occurred:\n{str(e)}")
 
     def filter_table(self):
-        query = self.search_input.text().lower().strip()
+        query = self.search_input.text().strip()
         
-        for row in range(self.table.rowCount()):
-            match = False
-            # Check every column in this row for a match
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item and query in item.text().lower():
-                    match = True
-                    break
-            
-            # Show or hide row based on match
-            self.table.setRowHidden(row, not match)
+        # The index resolves the query to matching row ids; the proxy only shows those
+        self.proxy.set_row_filter(self.search_index.search(query))
         
         # Update status bar with filter results
-        visible_rows = sum(1 for r in range(self.table.rowCount()) if not self.table.isRowHidden(r))
+        visible_rows = self.proxy.rowCount()
         if query:
-            self.status_label.setText(f" Filtered: Showing {visible_rows} of {self.table.rowCount()} invoices")
+            self.status_label.setText(f" Filtered: Showing {visible_rows} of {self.model.rowCount()} invoices")
         else:
             self.status_label.setText(" Analysis Complete")
 
 if __name__ == "__main__":
+    # Required for the extraction process pool in the frozen (PyInstaller) build
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     # --- Windows Taskbar Icon Fix ---
     if sys.platform == 'win32':
         import ctypes
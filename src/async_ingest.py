@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+from loguru import logger
+
+from src.config import POOL_WORKERS, ASYNC_READ_AHEAD
+from src.metrics import metrics
+from src.pool import ExtractionPool, process_file, _init_worker, _process_in_worker
+
+
+def _read_bytes(pdf_path: str) -> bytes:
+    with metrics.timer("io.read"):
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+    metrics.incr("bytes_read", len(data))
+    return data
+
+
+class AsyncExtractionPool(ExtractionPool):
+    """
+    ExtractionPool front end for slow (network) storage.
+    An asyncio loop keeps up to `read_ahead` files being read concurrently on I/O threads
+    while earlier files are extracted on the CPU executor (a worker thread, or worker
+    processes when workers > 1), so I/O latency overlaps with compute instead of adding to it.
+    Documents are opened from the prefetched bytes, which also feed the cache hash.
+    Same results, order and cache/journal behaviour as ExtractionPool.imap.
+    """
+
+    def __init__(self, workers: int = POOL_WORKERS, cache=None, journal=None,
+                 read_ahead: int = ASYNC_READ_AHEAD, **kwargs):
+        # No pre-scan: it would read every file up front, which is what this class avoids
+        kwargs.setdefault("prescan", False)
+        super().__init__(workers, cache, journal, **kwargs)
+        self.read_ahead = max(1, read_ahead)
+        self._extractor = self._parser = None
+
+    def imap(self, pdf_files: List[str],
+             should_stop: Optional[Callable[[], bool]] = None
+             ) -> Iterator[Tuple[int, str, Optional[Dict[str, Any]], Optional[str]]]:
+        if self.daemon is not None or self.profiler is not None:
+            # The daemon reads files itself and profiling wants in-process, unoverlapped runs
+            yield from super().imap(pdf_files, should_stop)
+            return
+
+        should_stop = should_stop or (lambda: False)
+        # Drive the async generator from this thread; read/extract work keeps running
+        # on the executors between results
+        loop = asyncio.new_event_loop()
+        results = self._results(pdf_files)
+        try:
+            while not should_stop():
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+
+    async def _results(self, pdf_files: List[str]):
+        io_pool = ThreadPoolExecutor(max_workers=self.read_ahead, thread_name_prefix="pdf-read")
+        if self.workers > 1:
+            logger.info(f"Starting async ingest with {self.workers} worker processes...")
+            ctx = multiprocessing.get_context("spawn")
+            cpu_pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx, initializer=_init_worker)
+        else:
+            cpu_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-extract")
+
+        queued = iter(enumerate(pdf_files, start=1))
+        # Files in flight (reading or extracting); each holds its bytes until extracted
+        pending = deque()
+        window = max(self.read_ahead, self.workers)
+        completed = False
+        try:
+            while True:
+                while len(pending) < window:
+                    item = next(queued, None)
+                    if item is None:
+                        break
+                    i, pdf_path = item
+                    pending.append((i, pdf_path, asyncio.ensure_future(self._ingest(pdf_path, io_pool, cpu_pool))))
+                if not pending:
+                    completed = True
+                    return
+                i, pdf_path, task = pending.popleft()
+                data, error = await task
+                yield i, pdf_path, data, error
+        finally:
+            # On an early stop, drop the read-ahead and let in-flight extraction finish in the background
+            tasks = [task for _, _, task in pending]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            io_pool.shutdown(wait=completed, cancel_futures=True)
+            cpu_pool.shutdown(wait=completed, cancel_futures=True)
+
+    async def _ingest(self, pdf_path: str, io_pool, cpu_pool) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        try:
+            entry = self._journaled(pdf_path)
+            if entry is not None:
+                metrics.incr("files.resumed")
+                return entry["data"], None
+
+            pdf_bytes = await loop.run_in_executor(io_pool, _read_bytes, pdf_path)
+            content_hash = None
+            if self.cache is not None:
+                # Same SHA-256 as file_hash(), without reading the file a second time
+                content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+                hit = self.cache.get(content_hash)
+                if hit:
+                    metrics.incr("files.cached")
+                    self._checkpoint(pdf_path, hit[1])
+                    return hit[1], None
+
+            if self.workers > 1:
+                elements, data, stats = await loop.run_in_executor(
+                    cpu_pool, _process_in_worker, pdf_path, self.cache is not None, pdf_bytes)
+                metrics.merge(stats)
+            else:
+                elements, data = await loop.run_in_executor(cpu_pool, self._process_local, pdf_path, pdf_bytes)
+
+            self._store(content_hash, elements, data)
+            self._checkpoint(pdf_path, data)
+            return data, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return None, str(e)
+
+    def _process_local(self, pdf_path: str, pdf_bytes: bytes):
+        # Runs on the single extraction thread, which owns the extractor
+        if self._parser is None:
+            from src.extractor import PDFExtractor
+            from src.parser import InvoiceParser
+            self._extractor, self._parser = PDFExtractor(), InvoiceParser()
+        return process_file(self._extractor, self._parser, pdf_path, pdf_bytes,
+                            keep_elements=self.cache is not None)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+from typing import Optional, List, Dict, Any, Tuple
+from loguru import logger
+
+from src.elements import as_dicts
+from src.config import (FIELD_MAPPINGS, CACHE_MAX_MB, OCR_MODE, OCR_TEMPLATE_REGIONS, OCR_TEMPLATE_MIN_MATCHES,
+                        OCR_TEMPLATE_MIN_RULES, OCR_TEMPLATE_RULE_LENGTH, PARSER_ENGINE, PARSER_SOURCES,
+                        EARLY_EXIT, EARLY_EXIT_FIELDS)
+
+
+def file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of the file contents, read in chunks so large packets stay cheap on memory.
+    """
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_fingerprint() -> str:
+    """
+    Identifies the extractor/parser logic that produced a cached result.
+    Any change to the version constants, FIELD_MAPPINGS, the OCR mode/template, the
+    parser engine, the early-exit settings or the extractor/parser source (where the regexes live) yields a new fingerprint and
+    invalidates old entries.
+    """
+    from src import extractor, parser, spatial, elements
+
+    h = hashlib.sha256()
+    h.update(extractor.EXTRACTOR_VERSION.encode())
+    h.update(parser.PARSER_VERSION.encode())
+    h.update(json.dumps(FIELD_MAPPINGS, sort_keys=True).encode())
+    h.update(json.dumps([OCR_MODE, OCR_TEMPLATE_REGIONS, OCR_TEMPLATE_MIN_MATCHES, OCR_TEMPLATE_MIN_RULES,
+                         OCR_TEMPLATE_RULE_LENGTH, PARSER_ENGINE, PARSER_SOURCES], sort_keys=True).encode())
+    # Early exit caches only the pages read, so a full-document run must not reuse those entries
+    h.update(json.dumps([EARLY_EXIT, EARLY_EXIT_FIELDS]).encode())
+    for module in (extractor, parser, spatial, elements):
+        try:
+            h.update(inspect.getsource(module).encode())
+        except (OSError, TypeError):
+            # Frozen builds ship without sources; the version constants cover them
+            pass
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent, size-bounded (LRU) cache of extraction results keyed by file content hash.
+    Stores both the structured elements and the parsed field dict.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = CACHE_MAX_MB * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.fingerprint = cache_fingerprint()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # Opened by the driver but used from the pipeline's extraction thread (one thread at a time)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                content_hash TEXT PRIMARY KEY,
+                fingerprint  TEXT NOT NULL,
+                elements     TEXT NOT NULL,
+                data         TEXT NOT NULL,
+                size         INTEGER NOT NULL,
+                last_used    REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON entries(last_used)")
+
+        # Drop everything produced by a different extractor/parser version
+        stale = self.conn.execute("DELETE FROM entries WHERE fingerprint != ?", (self.fingerprint,)).rowcount
+        self.conn.commit()
+        if stale:
+            logger.info(f"Invalidated {stale} cached results from an older parser/extractor version.")
+
+    def get(self, content_hash: str) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Returns (elements, data) for a cached file, or None on a miss.
+        """
+        row = self.conn.execute(
+            "SELECT elements, data FROM entries WHERE content_hash = ? AND fingerprint = ?",
+            (content_hash, self.fingerprint)).fetchone()
+        if row is None:
+            return None
+
+        self.conn.execute("UPDATE entries SET last_used = ? WHERE content_hash = ?", (time.time(), content_hash))
+        self.conn.commit()
+        return json.loads(row[0]), json.loads(row[1])
+
+    def put(self, content_hash: str, elements, data: Dict[str, Any]):
+        # Stored as element dicts, whichever representation the extractor returned
+        elements_json = json.dumps(as_dicts(elements))
+        data_json = json.dumps(data)
+        size = len(elements_json) + len(data_json)
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (content_hash, self.fingerprint, elements_json, data_json, size, time.time()))
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for content_hash, size in self.conn.execute(
+                "SELECT content_hash, size FROM entries ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM entries WHERE content_hash = ?", (content_hash,))
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} cached results to stay under {self.max_bytes} bytes.")
+
+    def clear(self):
+        """Drops every cached result (e.g. after editing FIELD_MAPPINGS in a frozen build)."""
+        self.conn.execute("DELETE FROM entries")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+
+    def close(self):
+        self.conn.close()
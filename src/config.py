@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 
 # Configuration for file paths
 INPUT_FOLDER = "input_invoices"
@@ -24,3 +24,161 @@ FIELD_MAPPINGS: Dict[str, List[str]] = {
     "waybill_number": ["Bill of Lading", "WayBill Number", "Waybill"],
     "invoice_number": ["Invoice Number", "Exporter Number", "Invoice No", "Exporter No"],
 }
+
+# Parallel processing
+# Number of worker processes used for batch extraction.
+# 1 processes files in-process (original behaviour), 0 uses one worker per CPU core.
+# Every worker loads its own OCR model, so budget roughly 1 GB of RAM per worker.
+POOL_WORKERS = 1
+
+# Result cache
+# Re-runs skip PDFs whose content was already processed by the same extractor/parser version.
+# The cache lives in the output folder and is trimmed (least recently used first) to CACHE_MAX_MB.
+CACHE_ENABLED = True
+CACHE_FILENAME = ".jarvis_cache.sqlite"
+CACHE_MAX_MB = 512
+
+# Page-level OCR parallelism (within a single PDF)
+# Scanned pages are rendered ahead and OCR'd concurrently by this many threads sharing one reader.
+# 1 keeps the original page-by-page behaviour. Combine with POOL_WORKERS > 1 sparingly.
+OCR_PAGE_WORKERS = 1
+# Maximum number of rendered page images held in memory while waiting for OCR
+OCR_MAX_PENDING_PAGES = 4
+
+# OCR engine start-up
+# The EasyOCR model only loads when the first scanned page is met. With OCR_PRESCAN the batch is
+# classified up front (first page of each PDF, no OCR imports); if any file looks scanned the model
+# is loaded in the background while digital files are processed.
+OCR_PRESCAN = True
+
+# Region-of-interest OCR
+# "full" OCRs scanned pages edge to edge. "template" only OCRs the CBP 7501 boxes the parser
+# reads and falls back to full-page OCR when a page does not match the form layout.
+OCR_MODE = "full"
+# Regions are fractions of the page (x0, y0, x1, y1) on the standard CBP 7501 layout.
+# The first region is also the probe: a page is treated as a 7501 only when at least
+# OCR_TEMPLATE_MIN_MATCHES of its labels are read back.
+OCR_TEMPLATE_REGIONS: List[Dict[str, Any]] = [
+    # Boxes 3, 7, 10, 11, 14, 15 (dates and countries, right half of the header)
+    {"name": "header_dates", "box": (0.45, 0.0, 1.0, 0.22),
+     "labels": ["Summary Date", "Entry Date", "Country of Origin", "Import Date", "Exporting Country", "Export Date"]},
+    # Box 12 (B/L or AWB number)
+    {"name": "waybill", "box": (0.0, 0.12, 0.5, 0.22), "labels": ["B/L or AWB"]},
+    # Invoice references in the line-item description column
+    {"name": "invoice", "box": (0.05, 0.30, 0.55, 0.55), "labels": ["Invoice"]},
+    # Box 35 (total entered value)
+    {"name": "entered_value", "box": (0.0, 0.70, 0.55, 0.80), "labels": ["Total Entered Value"]},
+    # Boxes 37-40 (duty, tax, other, total)
+    {"name": "totals", "box": (0.55, 0.75, 1.0, 0.95), "labels": ["Duty", "Tax", "Other", "Total"]},
+]
+OCR_TEMPLATE_MIN_MATCHES = 3
+# Layout check run before the probe (no OCR, a few milliseconds): the 7501 is a ruled grid, so a page
+# is only probed when it has at least OCR_TEMPLATE_MIN_RULES horizontal rules, each at least
+# OCR_TEMPLATE_RULE_LENGTH of the page width. Other pages (letters, plain invoices) go straight
+# to full-page OCR instead of paying for the probe as well.
+OCR_TEMPLATE_MIN_RULES = 5
+OCR_TEMPLATE_RULE_LENGTH = 0.3
+
+# Parser engine
+# "text" parses the joined text stream with windowed regexes.
+# "spatial" first reads each field from the nearest value right of / below its box label
+# (using element coordinates) and falls back to the text logic for anything it cannot place.
+PARSER_ENGINE = "text"
+# With the spatial engine, adds a "Sources" column for auditing: JSON mapping each field read from
+# the page geometry to the box it came from, e.g. {"Duty": {"page": 0, "x": .., "y": .., "w": .., "h": .., "text": ..}}
+PARSER_SOURCES = False
+
+# Export
+# Stream rows into the workbook as files are processed (constant memory on very large batches)
+# instead of building the whole table in memory and writing it at the end.
+EXPORT_STREAMING = True
+# Output format for batch runs: "xlsx", "csv", "jsonl" or "parquet" (parquet needs pyarrow).
+# The columnar formats carry real dates and 2-place decimal amounts; the output file name
+# keeps OUTPUT_FILENAME's stem with the matching extension.
+EXPORT_FORMAT = "xlsx"
+
+# Checkpoint / resume
+# Every completed file is appended to a journal in the output folder. An interrupted run
+# (crash or "Stop & Export") resumes from it next time; a completed run deletes it.
+JOURNAL_ENABLED = True
+JOURNAL_FILENAME = ".jarvis_journal.jsonl"
+
+# Duplicate detection
+# Fields that identify an invoice when grouping duplicates, e.g.
+# ["Invoice Number", "Waybill Number", "Total"]. None compares every field except id/filename.
+DUPLICATE_KEYS: Optional[List[str]] = None
+
+# GUI result delivery
+# The worker coalesces processed rows and emits them in batches, flushed when
+# either limit is reached, so fast runs don't flood the UI event loop.
+UI_BATCH_MAX_ROWS = 200
+UI_BATCH_INTERVAL_MS = 100
+
+# Extraction daemon
+# `python -m src.daemon` keeps the OCR model resident and serves extraction jobs over a local
+# Unix socket (named pipe on Windows). When enabled and reachable, the GUI and CLI send their
+# files to it instead of loading the model themselves; otherwise they extract locally.
+DAEMON_ENABLED = False
+# None picks a per-user default: \\.\pipe\jarvis-extractor-<user> on Windows, elsewhere a socket in a
+# private (0700) directory under XDG_RUNTIME_DIR or the temp dir
+DAEMON_ADDRESS: Optional[str] = None
+# Daemon and clients authenticate with a random per-user key, generated on the daemon's first start
+# and kept in a 0600 file. None = %LOCALAPPDATA%\jarvis\daemon.key on Windows, ~/.config/jarvis/daemon.key elsewhere
+DAEMON_KEY_FILE: Optional[str] = None
+
+# Metrics
+# Stage timers (open, get_text, render, OCR, parse, export) and page/byte counters are collected
+# for every run and written as JSON next to the output file. METRICS_SHOW_IN_GUI adds a
+# throughput card to the dashboard.
+METRICS_ENABLED = True
+METRICS_FILENAME = "run_metrics.json"
+METRICS_SHOW_IN_GUI = False
+
+# Profiling (main.py --profile, Ctrl+Shift+P in the GUI)
+# Each file's extraction + parsing runs under cProfile. The aggregated top-N hotspot report and
+# the .prof dumps of the slowest files are written to this folder inside the output folder.
+# Profiling runs files in-process (POOL_WORKERS is ignored).
+PROFILE_DIRNAME = "profiles"
+PROFILE_TOP_N = 30
+PROFILE_KEEP_SLOWEST = 5
+
+# Watch-folder mode (main.py --watch, "Watch Folder" in the GUI)
+# INPUT_FOLDER is polled for new or changed PDFs (size + mtime). A file is only picked up once
+# its size and mtime have not changed for WATCH_SETTLE_SECONDS, so copies in progress are skipped.
+# csv/jsonl output is appended to; xlsx/parquet get one part file per batch. What was exported is
+# kept in a sidecar next to the output (.consolidated_invoices.csv.watch.json), so a restarted
+# session skips files it already handled, continues the ids, and replaces the row of an edited file.
+WATCH_POLL_SECONDS = 2.0
+WATCH_SETTLE_SECONDS = 3.0
+
+# Streaming pipeline
+# Parsed results waiting for the export stage. When the exporter falls behind, extraction
+# blocks once this many results are queued, so memory stays bounded on any batch size.
+PIPELINE_QUEUE_SIZE = 32
+
+# Asynchronous ingest (main.py --async-io)
+# For slow network shares: file bytes are read ahead concurrently while earlier files are being
+# extracted, and documents are opened from memory. ASYNC_READ_AHEAD caps the files held in memory.
+ASYNC_INGEST = False
+ASYNC_READ_AHEAD = 8
+
+# Large documents
+# Documents are extracted page by page and, when read from disk, opened through a read-only
+# memory map, so the OS pages the file in on demand instead of it being copied into memory.
+# Falls back to a plain file open where mapping is not supported (e.g. empty files).
+# Rendered pages are bounded (OCR_MAX_PENDING_PAGES); the extracted words of the whole document
+# are still collected for parsing, except with EARLY_EXIT and the cache off, where only the
+# current and previous page are held.
+PDF_MMAP = True
+
+# Early exit (incremental parsing, opt-in)
+# Pages are parsed as they are extracted; once every field in EARLY_EXIT_FIELDS has a value, the
+# remaining pages (continuation sheets, attached commercial invoices) are neither extracted nor
+# OCR'd. A field that only appears after that point comes back empty, so every output field is
+# required by default; removing one (e.g. Invoice Number) stops earlier at the risk of losing it.
+EARLY_EXIT = False
+EARLY_EXIT_FIELDS = [
+    "Country of Origin", "Exporting Country", "Waybill Number",
+    "Summary Date", "Entry Date", "Import Date", "Export Date",
+    "Total Entered Value", "Duty", "Tax", "Other", "Total", "Invoice Number",
+]
@@ -0,0 +1,277 @@
+import os
+import sys
+import stat
+import getpass
+import secrets
+import argparse
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from loguru import logger
+
+from src.config import DAEMON_ADDRESS, DAEMON_KEY_FILE
+
+
+def _private_dir(path: str) -> str:
+    """
+    Creates `path` with mode 0700 if needed. Raises PermissionError unless it is a real
+    directory owned by the current user and closed to everyone else.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if sys.platform != 'win32':
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise PermissionError(f"{path} must be a directory private to the current user")
+    return path
+
+
+def _runtime_dir() -> str:
+    """Private per-user directory for the socket: under XDG_RUNTIME_DIR, else in the temp dir."""
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base and os.path.isdir(base):
+        return _private_dir(os.path.join(base, "jarvis"))
+    return _private_dir(os.path.join(tempfile.gettempdir(), f"jarvis-{os.getuid()}"))
+
+
+def default_address() -> str:
+    """
+    Per-user endpoint: a named pipe on Windows, a Unix socket in a private runtime dir elsewhere.
+    """
+    if sys.platform == 'win32':
+        return rf"\\.\pipe\jarvis-extractor-{getpass.getuser()}"
+    return os.path.join(_runtime_dir(), "extractor.sock")
+
+
+def default_key_file() -> str:
+    """The per-user daemon key: %LOCALAPPDATA%\\jarvis on Windows, ~/.config/jarvis elsewhere."""
+    if sys.platform == 'win32':
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "jarvis", "daemon.key")
+
+
+def load_authkey(key_file: Optional[str] = DAEMON_KEY_FILE, create: bool = False) -> Optional[bytes]:
+    """
+    Reads the secret shared by the daemon and its clients. With create=True (the daemon)
+    a random key is generated on first start and written with mode 0600.
+    Returns None when there is no key yet (no daemon has ever run for this user).
+    Raises PermissionError when the key file belongs to someone else or others can read it.
+    """
+    key_file = key_file or default_key_file()
+    if create and not os.path.exists(key_file):
+        os.makedirs(os.path.dirname(key_file), mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Another daemon got there first; use its key
+            pass
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(32))
+            logger.info(f"Generated extraction daemon key at {key_file}")
+
+    try:
+        fd = os.open(key_file, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    except FileNotFoundError:
+        return None
+    with os.fdopen(fd, "rb") as f:
+        if sys.platform != 'win32':
+            st = os.fstat(f.fileno())
+            if st.st_uid != os.getuid() or st.st_mode & 0o077:
+                raise PermissionError(f"{key_file} must be owned by the current user with mode 0600")
+        return f.read() or None
+
+
+def _check_endpoint(address: str):
+    """
+    Refuses a Unix socket that is not a socket owned by the current user.
+    Named pipes cannot be checked this way; there the handshake protects the client, since
+    Client() also challenges the server and an endpoint without the key fails before any
+    pickled data is read.
+    """
+    if _family(address) != "AF_UNIX":
+        return
+    st = os.lstat(address)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{address} is not a socket owned by the current user")
+
+
+def _family(address: str) -> str:
+    return "AF_PIPE" if sys.platform == 'win32' else "AF_UNIX"
+
+
+class ExtractionDaemon:
+    """
+    Long-lived extraction service. Loads the OCR model once, then serves
+    extraction jobs from any number of local clients.
+
+    Protocol (pickled tuples over multiprocessing.connection):
+        ("ping",)                 -> ("ok", pid)
+        ("extract", [pdf paths])  -> ("file", path, elements, error) per file, then ("done",)
+        ("shutdown",)             -> ("ok", pid), then the daemon exits
+    """
+
+    def __init__(self, address: Optional[str] = DAEMON_ADDRESS, authkey: Optional[bytes] = None):
+        self.address = address or default_address()
+        # None = the per-user key from load_authkey(), generated on first start
+        self.authkey = authkey or load_authkey(create=True)
+        self.extractor = None
+        # MuPDF/EasyOCR state is shared, so jobs from concurrent clients run one at a time
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def serve(self):
+        from src.extractor import PDFExtractor, get_ocr_reader
+
+        self.extractor = PDFExtractor()
+        get_ocr_reader()
+
+        unix = _family(self.address) == "AF_UNIX"
+        if unix and os.path.lexists(self.address):
+            # Left behind by a daemon that did not shut down cleanly
+            _check_endpoint(self.address)
+            os.remove(self.address)
+
+        with Listener(self.address, family=_family(self.address), authkey=self.authkey) as listener:
+            if unix:
+                os.chmod(self.address, 0o600)
+            logger.info(f"Extraction daemon listening on {self.address}")
+            while not self.stopping.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError) as e:
+                    # Failed handshake (e.g. wrong authkey); keep serving others
+                    logger.warning(f"Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        logger.info("Extraction daemon stopped.")
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                while True:
+                    request = conn.recv()
+                    command = request[0]
+                    if command == "ping":
+                        conn.send(("ok", os.getpid()))
+                    elif command == "extract":
+                        for pdf_path in request[1]:
+                            with self.lock:
+                                elements, error = self._extract(pdf_path)
+                            conn.send(("file", pdf_path, elements, error))
+                        conn.send(("done",))
+                    elif command == "shutdown":
+                        conn.send(("ok", os.getpid()))
+                        self.stopping.set()
+                        # Unblock accept() in the serving thread
+                        self._wake()
+                        return
+                    else:
+                        conn.send(("error", f"Unknown command: {command!r}"))
+            except (EOFError, OSError):
+                # Client went away (possibly mid-job)
+                return
+
+    def _extract(self, pdf_path: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        try:
+            return self.extractor.extract_structured_data(pdf_path), None
+        except Exception as e:
+            return [], str(e)
+
+    def _wake(self):
+        try:
+            Client(self.address, family=_family(self.address), authkey=self.authkey).close()
+        except OSError:
+            pass
+
+
+class DaemonClient:
+    """
+    Connection to a running ExtractionDaemon.
+    Offers the PDFExtractor.extract_structured_data interface, so it can stand in for a local extractor.
+    """
+
+    def __init__(self, address: Optional[str] = DAEMON_ADDRESS, authkey: Optional[bytes] = None):
+        self.address = address or default_address()
+        authkey = authkey or load_authkey()
+        if authkey is None:
+            raise FileNotFoundError("No extraction daemon key; start the daemon first")
+        _check_endpoint(self.address)
+        self.conn = Client(self.address, family=_family(self.address), authkey=authkey)
+
+    def ping(self) -> int:
+        self.conn.send(("ping",))
+        return self.conn.recv()[1]
+
+    def extract_many(self, pdf_paths: List[str]) -> Iterator[Tuple[str, List[Dict[str, Any]], Optional[str]]]:
+        """
+        Yields (path, elements, error) as the daemon finishes each file.
+        """
+        # The daemon has its own working directory
+        self.conn.send(("extract", [os.path.abspath(p) for p in pdf_paths]))
+        while True:
+            reply = self.conn.recv()
+            if reply[0] == "done":
+                return
+            if reply[0] == "error":
+                raise RuntimeError(reply[1])
+            _, path, elements, error = reply
+            yield path, elements, error
+
+    def extract_structured_data(self, file_path: str) -> List[Dict[str, Any]]:
+        for _, elements, error in self.extract_many([file_path]):
+            if error:
+                logger.error(f"Failed structured extraction from {file_path}: {error}")
+            return elements
+        return []
+
+    def shutdown(self):
+        self.conn.send(("shutdown",))
+        self.conn.recv()
+
+    def close(self):
+        self.conn.close()
+
+
+def connect_daemon(address: Optional[str] = DAEMON_ADDRESS, authkey: Optional[bytes] = None) -> Optional[DaemonClient]:
+    """
+    Returns a client for a running daemon, or None when none is reachable
+    (or the endpoint is not owned by the current user / fails authentication).
+    """
+    try:
+        address = address or default_address()
+        if _family(address) == "AF_UNIX" and not os.path.lexists(address):
+            return None
+        client = DaemonClient(address, authkey)
+        client.ping()
+        return client
+    except (OSError, EOFError, AuthenticationError) as e:
+        logger.debug(f"Extraction daemon not reachable at {address}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the OCR model resident and serve extraction jobs.")
+    parser.add_argument("--address", default=DAEMON_ADDRESS,
+                        help="Socket path / pipe name (default: per-user endpoint).")
+    parser.add_argument("--stop", action="store_true", help="Shut down a running daemon.")
+    args = parser.parse_args()
+
+    if args.stop:
+        client = connect_daemon(args.address)
+        if client is None:
+            logger.warning("No extraction daemon is running.")
+            return
+        client.shutdown()
+        client.close()
+        logger.info("Extraction daemon stopped.")
+        return
+
+    ExtractionDaemon(args.address).serve()
+
+
+if __name__ == "__main__":
+    main()
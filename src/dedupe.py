@@ -0,0 +1,48 @@
+import json
+import hashlib
+from typing import Optional, List, Dict, Any
+
+from src.config import DUPLICATE_KEYS
+
+# Per-file metadata that never takes part in duplicate detection
+# (Sources holds box positions, which differ between two scans of the same invoice)
+METADATA_KEYS = ('id', 'filename', 'Sources')
+
+
+class DuplicateIndex:
+    """
+    Hash index of the invoices seen in a run, for O(1) duplicate checks.
+    By default two records are duplicates when every field except id/filename is
+    identical; a list of keys (e.g. Invoice Number + Waybill Number + Total) narrows that.
+    """
+
+    def __init__(self, keys: Optional[List[str]] = DUPLICATE_KEYS):
+        self.keys = list(keys) if keys else None
+        self._seen: Dict[str, str] = {}  # digest -> filename of the first occurrence
+
+    def _digest(self, record: Dict[str, Any]) -> Optional[str]:
+        if self.keys:
+            items = [(k, record.get(k, "")) for k in self.keys]
+            # Records with none of the configured keys filled can't be told apart; never group them
+            if not any(v for _, v in items):
+                return None
+        else:
+            items = sorted((k, v) for k, v in record.items() if k not in METADATA_KEYS)
+        return hashlib.sha1(json.dumps(items, default=str).encode()).hexdigest()
+
+    def check(self, record: Dict[str, Any]) -> Optional[str]:
+        """
+        Registers the record and returns None, or returns the filename of the
+        original when the record duplicates one already seen.
+        """
+        digest = self._digest(record)
+        if digest is None:
+            return None
+        original = self._seen.get(digest)
+        if original is not None:
+            return original
+        self._seen[digest] = record.get('filename', "")
+        return None
+
+    def clear(self):
+        self._seen.clear()
@@ -0,0 +1,102 @@
+import numpy as np
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Union
+
+
+class ElementTable:
+    """
+    Columnar container for extracted words: one NumPy array per coordinate plus a
+    list of strings, instead of one six-key dict per word.
+    Iterating, indexing or to_dicts() give the classic element dicts
+    ({"text", "x", "y", "w", "h", "page"}) for code that expects them.
+    """
+    __slots__ = ("text", "x", "y", "w", "h", "page", "_joined")
+
+    def __init__(self, text: List[str], x: np.ndarray, y: np.ndarray, w: np.ndarray, h: np.ndarray,
+                 page: np.ndarray):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.page = page
+        # Reading-order text, built on first use
+        self._joined: Optional[str] = None
+
+    @classmethod
+    def from_columns(cls, text: List[str], x: Sequence[float], y: Sequence[float], w: Sequence[float],
+                     h: Sequence[float], page: Union[int, Sequence[int]]) -> "ElementTable":
+        n = len(text)
+        pages = np.full(n, page, dtype=np.int32) if isinstance(page, int) else np.asarray(page, dtype=np.int32)
+        return cls(list(text), np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+                   np.asarray(w, dtype=np.float64), np.asarray(h, dtype=np.float64), pages)
+
+    @classmethod
+    def from_words(cls, words: Sequence[tuple], page: int) -> "ElementTable":
+        """From PyMuPDF get_text("words") tuples (x0, y0, x1, y1, word, ...)."""
+        if not words:
+            return cls.empty()
+        boxes = np.array([w[:4] for w in words], dtype=np.float64)
+        return cls([w[4] for w in words], boxes[:, 0], boxes[:, 1], boxes[:, 2] - boxes[:, 0],
+                   boxes[:, 3] - boxes[:, 1], np.full(len(words), page, dtype=np.int32))
+
+    @classmethod
+    def from_dicts(cls, elements: Iterable[Dict[str, Any]]) -> "ElementTable":
+        elements = list(elements)
+        return cls.from_columns([e['text'] for e in elements], [e['x'] for e in elements],
+                                [e['y'] for e in elements], [e['w'] for e in elements],
+                                [e['h'] for e in elements], [e['page'] for e in elements])
+
+    @classmethod
+    def empty(cls) -> "ElementTable":
+        return cls.from_columns([], [], [], [], [], [])
+
+    @classmethod
+    def concat(cls, tables: Sequence["ElementTable"]) -> "ElementTable":
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+        return cls([s for t in tables for s in t.text],
+                   np.concatenate([t.x for t in tables]), np.concatenate([t.y for t in tables]),
+                   np.concatenate([t.w for t in tables]), np.concatenate([t.h for t in tables]),
+                   np.concatenate([t.page for t in tables]))
+
+    def reading_order(self) -> np.ndarray:
+        """Indices sorted by page, then y, then x (stable, like sorting the dicts)."""
+        return np.lexsort((self.x, self.y, self.page))
+
+    def joined_text(self) -> str:
+        """All words in reading order joined by spaces."""
+        if self._joined is None:
+            text = self.text
+            self._joined = " ".join([text[i] for i in self.reading_order().tolist()])
+        return self._joined
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Plain element dicts (JSON/pickle friendly Python scalars)."""
+        return [{"text": t, "x": x, "y": y, "w": w, "h": h, "page": p}
+                for t, x, y, w, h, p in zip(self.text, self.x.tolist(), self.y.tolist(), self.w.tolist(),
+                                            self.h.tolist(), self.page.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_dicts())
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return {"text": self.text[i], "x": float(self.x[i]), "y": float(self.y[i]), "w": float(self.w[i]),
+                "h": float(self.h[i]), "page": int(self.page[i])}
+
+    def __getstate__(self):
+        return (self.text, self.x, self.y, self.w, self.h, self.page)
+
+    def __setstate__(self, state):
+        self.text, self.x, self.y, self.w, self.h, self.page = state
+        self._joined = None
+
+
+def as_dicts(elements: Union["ElementTable", List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Element dicts from either representation (for JSON and dict-based consumers)."""
+    return elements.to_dicts() if isinstance(elements, ElementTable) else elements
@@ -1,43 +1,355 @@
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 from loguru import logger
+from decimal import Decimal, InvalidOperation
+import datetime
+import json
+import csv
+import re
 import os
 
+from src.metrics import metrics
+
+# Preferred column order, shared by the batch and streaming exports
+COLUMN_ORDER = [
+    'id', 'filename', 'Invoice Number', 'Waybill Number', 
+    'Summary Date', 'Entry Date', 'Import Date', 'Export Date', 
+    'Country of Origin', 'Exporting Country', 
+    'Duty', 'Tax', 'Other', 'Total', 'Total Entered Value'
+]
+
+# Typed columns for the columnar formats (xlsx keeps the values exactly as parsed)
+DATE_COLUMNS = ['Summary Date', 'Entry Date', 'Import Date', 'Export Date']
+DECIMAL_COLUMNS = ['Duty', 'Tax', 'Other', 'Total', 'Total Entered Value']
+
+EXPORT_FORMATS = ["xlsx", "csv", "jsonl", "parquet"]
+
+_DATE_PARTS_RE = re.compile(r"(\d{1,2})[\/\.\-](\d{1,2})[\/\.\-](\d{2,4})")
+_CENTS = Decimal("0.01")
+
+def with_format_extension(output_path: str, fmt: str) -> str:
+    """Swaps the file extension to match the export format (consolidated_invoices.xlsx -> .csv)."""
+    return os.path.splitext(output_path)[0] + "." + fmt
+
+def format_from_path(output_path: str) -> str:
+    ext = os.path.splitext(output_path)[1].lower().lstrip(".")
+    return ext if ext in EXPORT_FORMATS else "xlsx"
+
+def parse_date(value: Any) -> Optional[datetime.date]:
+    """
+    Parses the MM/DD/YYYY (or MM-DD-YY, MM.DD.YYYY) strings produced by the parser.
+    Two-digit years follow strptime's %y convention (69-99 -> 1900s, 00-68 -> 2000s).
+    """
+    if isinstance(value, datetime.date):
+        return value
+    m = _DATE_PARTS_RE.fullmatch(str(value or "").strip())
+    if not m:
+        return None
+    month, day, year = (int(g) for g in m.groups())
+    if year < 100:
+        year += 1900 if year >= 69 else 2000
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        logger.debug(f"Unparseable date value: {value}")
+        return None
+
+def parse_decimal(value: Any) -> Optional[Decimal]:
+    """Parses an amount string ("1,234.50", "$ 12345") into a Decimal with 2 places."""
+    if isinstance(value, Decimal):
+        return value.quantize(_CENTS)
+    text = str(value if value is not None else "").replace(",", "").replace("$", "").strip()
+    if not text:
+        return None
+    try:
+        return Decimal(text).quantize(_CENTS)
+    except InvalidOperation:
+        logger.debug(f"Unparseable amount value: {value}")
+        return None
+
+def coerce_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns a copy of the record with date and amount columns converted to real types."""
+    typed = dict(record)
+    for col in DATE_COLUMNS:
+        if col in typed:
+            typed[col] = parse_date(typed[col])
+    for col in DECIMAL_COLUMNS:
+        if col in typed:
+            typed[col] = parse_decimal(typed[col])
+    return typed
+
+def ordered_columns(data: List[Dict[str, Any]]) -> List[str]:
+    """COLUMN_ORDER (where present) followed by any other keys, in first-seen order."""
+    seen = {}
+    for record in data:
+        for key in record:
+            seen.setdefault(key, None)
+    return [c for c in COLUMN_ORDER if c in seen] + [c for c in seen if c not in COLUMN_ORDER]
+
 class ExcelExporter:
     """
-    Handles exporting processed data to Excel.
+    Handles exporting processed data to Excel, CSV, JSON Lines or Parquet.
+    The format is taken from the file extension unless given explicitly.
     """
     
-    def export(self, data: List[Dict], output_path: str):
+    def export(self, data: List[Dict], output_path: str, fmt: Optional[str] = None):
         """
         Converts a list of dictionaries to a DataFrame and saves as Esxcel.
+        Other formats are written with typed dates/amounts through the matching writer.
         """
         if not data:
             logger.warning("No data to export.")
             return
 
+        fmt = fmt or format_from_path(output_path)
+        if fmt != "xlsx":
+            with self.open_stream(output_path, fmt, columns=ordered_columns(data)) as writer:
+                for record in data:
+                    writer.write(record)
+            return
+
         try:
             df = pd.DataFrame(data)
             
-            # Define preferred column order
-            preferred_order = [
-                'id', 'filename', 'Invoice Number', 'Waybill Number', 
-                'Summary Date', 'Entry Date', 'Import Date', 'Export Date', 
-                'Country of Origin', 'Exporting Country', 
-                'Duty', 'Tax', 'Other', 'Total', 'Total Entered Value'
-            ]
-            
             # Filter and order columns
-            existing_cols = [c for c in preferred_order if c in df.columns]
-            other_cols = [c for c in df.columns if c not in preferred_order]
+            existing_cols = [c for c in COLUMN_ORDER if c in df.columns]
+            other_cols = [c for c in df.columns if c not in COLUMN_ORDER]
             
             df = df[existing_cols + other_cols]
             
             # Ensure output directory exists
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
-            df.to_excel(output_path, index=False)
+            with metrics.timer("export.to_excel"):
+                df.to_excel(output_path, index=False)
             logger.info(f"Successfully exported {len(data)} records to {output_path}")
         except Exception as e:
             logger.error(f"Failed to export data to Excel: {e}")
             raise e
+
+    def open_stream(self, output_path: str, fmt: Optional[str] = None,
+                    columns: Optional[List[str]] = None, append: bool = False) -> "StreamingWriter":
+        """
+        Starts a streaming export: rows are written as they arrive and never held in memory.
+        With append=True, formats that support it (writer.appendable) add to an existing file.
+        """
+        fmt = fmt or format_from_path(output_path)
+        writers = {
+            "xlsx": StreamingExcelWriter,
+            "csv": StreamingCsvWriter,
+            "jsonl": StreamingJsonlWriter,
+            "parquet": StreamingParquetWriter,
+        }
+        if fmt not in writers:
+            raise ValueError(f"Unsupported export format '{fmt}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+        return writers[fmt](output_path, columns=columns, append=append)
+
+class StreamingWriter:
+    """
+    Base class for the streaming writers. Columns follow COLUMN_ORDER, then any extra
+    keys seen on the first record (unless given up front); nothing is saved when no
+    rows arrive.
+    """
+    format_name = ""
+    # Whether rows can be added to an existing file (append=True); others always overwrite
+    appendable = False
+
+    def __init__(self, output_path: str, columns: Optional[List[str]] = None, append: bool = False):
+        self.output_path = output_path
+        self.columns: Optional[List[str]] = columns
+        self.append = append and self.appendable
+        self.count = 0
+        self._started = False
+        self._dropped_keys = set()
+
+    def write(self, record: Dict[str, Any]):
+        if self.columns is None:
+            self.columns = COLUMN_ORDER + [k for k in record if k not in COLUMN_ORDER]
+        if not self._started:
+            # Ensure output directory exists
+            os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+            self._start()
+            self._started = True
+
+        # The header is already written, so keys first seen later cannot get a column
+        new_keys = [k for k in record if k not in self.columns and k not in self._dropped_keys]
+        if new_keys:
+            logger.warning(f"Streaming export: ignoring columns not present in the first record: {new_keys}")
+            self._dropped_keys.update(new_keys)
+
+        with metrics.timer("export.write"):
+            self._write_row(record)
+        self.count += 1
+
+    def close(self) -> int:
+        """
+        Finalizes the file. Returns the number of rows written (nothing is saved when 0).
+        """
+        if self.count == 0:
+            logger.warning("No data to export.")
+            return 0
+
+        try:
+            with metrics.timer("export.finish"):
+                self._finish()
+            logger.info(f"Successfully exported {self.count} records to {self.output_path}")
+            return self.count
+        except Exception as e:
+            logger.error(f"Failed to export data to {self.format_name}: {e}")
+            raise e
+
+    def _start(self):
+        pass
+
+    def _write_row(self, record: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class StreamingExcelWriter(StreamingWriter):
+    """
+    Writes records to an xlsx file one row at a time using openpyxl's write-only
+    workbook, so memory stays flat regardless of the number of rows.
+    """
+    format_name = "Excel"
+
+    def _start(self):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Sheet1")
+        self.sheet.append(self._header_row())
+
+    def _write_row(self, record: Dict[str, Any]):
+        self.sheet.append([record.get(c) for c in self.columns])
+
+    def _header_row(self) -> List[Any]:
+        # Same header look as pandas' to_excel (bold, thin border, centred)
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+
+        thin = Side(style="thin")
+        cells = []
+        for name in self.columns:
+            cell = WriteOnlyCell(self.sheet, value=name)
+            cell.font = Font(bold=True)
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            cell.alignment = Alignment(horizontal="center", vertical="top")
+            cells.append(cell)
+        return cells
+
+    def _finish(self):
+        self.workbook.save(self.output_path)
+
+class StreamingCsvWriter(StreamingWriter):
+    """CSV with ISO dates and plain decimal amounts."""
+    format_name = "CSV"
+    appendable = True
+
+    def _start(self):
+        header = self._existing_header() if self.append else None
+        if header:
+            # Keep the existing file's column layout so appended rows line up
+            self.columns = header
+        self.file = open(self.output_path, "a" if header else "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if not header:
+            self.writer.writerow(self.columns)
+
+    def _existing_header(self) -> Optional[List[str]]:
+        try:
+            with open(self.output_path, newline="", encoding="utf-8") as f:
+                return next(csv.reader(f), None)
+        except OSError:
+            return None
+
+    def _write_row(self, record: Dict[str, Any]):
+        typed = coerce_record(record)
+        self.writer.writerow(["" if typed.get(c) is None else typed.get(c) for c in self.columns])
+
+    def _finish(self):
+        self.file.close()
+
+class StreamingJsonlWriter(StreamingWriter):
+    """One JSON object per line; amounts as exact decimal strings ("1234.50"), dates as ISO strings."""
+    format_name = "JSON Lines"
+    appendable = True
+
+    def _start(self):
+        self.file = open(self.output_path, "a" if self.append else "w", encoding="utf-8")
+
+    def _write_row(self, record: Dict[str, Any]):
+        typed = coerce_record(record)
+        row = {c: typed.get(c) for c in self.columns}
+        self.file.write(json.dumps(row, default=self._json_default) + "\n")
+
+    @staticmethod
+    def _json_default(value):
+        if isinstance(value, Decimal):
+            # A float would not round-trip every amount exactly
+            return str(value)
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        return str(value)
+
+    def _finish(self):
+        self.file.close()
+
+class StreamingParquetWriter(StreamingWriter):
+    """
+    Parquet with date32 dates and decimal128(18, 2) amounts, written in row groups
+    so only one batch is ever held in memory.
+    """
+    format_name = "Parquet"
+    batch_size = 1000
+
+    def _start(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow).")
+
+        self._pa = pa
+        fields = []
+        for c in self.columns:
+            if c == "id":
+                fields.append(pa.field(c, pa.int64()))
+            elif c in DATE_COLUMNS:
+                fields.append(pa.field(c, pa.date32()))
+            elif c in DECIMAL_COLUMNS:
+                fields.append(pa.field(c, pa.decimal128(18, 2)))
+            else:
+                fields.append(pa.field(c, pa.string()))
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(self.output_path, self.schema)
+        self.batch: List[Dict[str, Any]] = []
+
+    def _write_row(self, record: Dict[str, Any]):
+        typed = coerce_record(record)
+        row = {}
+        for field in self.schema:
+            value = typed.get(field.name)
+            if value is not None and field.type == self._pa.string():
+                value = str(value)
+            row[field.name] = value
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self.batch:
+            self.writer.write_table(self._pa.Table.from_pylist(self.batch, schema=self.schema))
+            self.batch = []
+
+    def _finish(self):
+        self._flush()
+        self.writer.close()
@@ -2,98 +2,425 @@ import fitz  # PyMuPDF
 # import easyocr (Moved to __init__ for performance)
 import numpy as np
 import os
-from PIL import Image
+import re
+import mmap
+import threading
+import time
 from loguru import logger
-from typing import Optional, List, Dict, Any
-import io
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Callable, Union
+from collections import deque
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from src.metrics import metrics
+from src.elements import ElementTable
+from src.config import (OCR_PAGE_WORKERS, OCR_MAX_PENDING_PAGES, OCR_MODE,
+                        OCR_TEMPLATE_REGIONS, OCR_TEMPLATE_MIN_MATCHES, OCR_TEMPLATE_MIN_RULES,
+                        OCR_TEMPLATE_RULE_LENGTH, PDF_MMAP)
+
+# Bump when a change alters the elements produced for the same PDF (invalidates the result cache)
+EXTRACTOR_VERSION = "1.0"
+
+# A page with more words than this has a usable text layer and skips OCR
+DIGITAL_MIN_WORDS = 10
+
+# Grayscale level below which a rendered pixel counts as ink (layout check)
+_INK_LEVEL = 192
+# Rows merged into one band by the layout check, so slightly skewed scan lines stay in one band
+_RULE_BAND_ROWS = 16
+# Breaks in a ruled line up to this many pixels wide are ignored
+_RULE_MAX_GAP = 2
+
+# Process-wide EasyOCR reader, created on first use and shared by every PDFExtractor
+_ocr_reader = None
+_ocr_reader_lock = threading.Lock()
+
+
+def get_ocr_reader():
+    """
+    Returns the shared EasyOCR reader, importing easyocr/torch and loading the model on first call.
+    """
+    global _ocr_reader
+    if _ocr_reader is None:
+        with _ocr_reader_lock:
+            if _ocr_reader is None:
+                # Heavy import kept here so digital-only runs never pay for it
+                import easyocr
+                logger.info("Initializing OCR Engine (EasyOCR)...")
+                # detail=1 gives us the bounding boxes
+                _ocr_reader = easyocr.Reader(['en'], gpu=False)
+    return _ocr_reader
+
+
+def warm_ocr_reader() -> threading.Thread:
+    """
+    Loads the OCR reader on a background thread so it is ready by the first scanned page.
+    """
+    thread = threading.Thread(target=get_ocr_reader, name="ocr-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def has_text_layer(page) -> bool:
+    return len(page.get_text("words")) > DIGITAL_MIN_WORDS
+
+
+def count_horizontal_rules(img_array: np.ndarray) -> int:
+    """
+    Counts the horizontal ruled lines on a rendered grayscale page, NumPy only (no OCR).
+    Rows are merged into bands of _RULE_BAND_ROWS; a band holds a rule when it has an unbroken
+    run of ink at least OCR_TEMPLATE_RULE_LENGTH of the page width. Text never does, since
+    the gaps between words break the run.
+    """
+    if img_array.ndim == 3:
+        img_array = img_array.min(axis=2)
+    height, width = img_array.shape
+    bands = height // _RULE_BAND_ROWS
+    if bands == 0 or width == 0:
+        return 0
+    # Darkest pixel of each column within each band
+    banded = img_array[:bands * _RULE_BAND_ROWS].reshape(bands, _RULE_BAND_ROWS, width).min(axis=1)
+    ink = np.zeros((bands, width + 2), dtype=np.int8)
+    ink[:, 1:-1] = banded < _INK_LEVEL
+    # Bridge the pixel gaps of faint or noisy scan lines (word gaps are far wider)
+    for _ in range(_RULE_MAX_GAP):
+        ink[:, 1:-1] |= ink[:, 2:]
+    # Runs of ink start at +1 and end at -1 steps; they come in pairs, band by band
+    steps = np.diff(ink, axis=1)
+    band_of_run, starts = np.nonzero(steps == 1)
+    _, ends = np.nonzero(steps == -1)
+    longest = np.zeros(bands, dtype=np.int64)
+    np.maximum.at(longest, band_of_run, ends - starts)
+    is_rule = longest >= OCR_TEMPLATE_RULE_LENGTH * width
+    # A thick or skewed rule spans adjacent bands: count each one once
+    return int(np.count_nonzero(is_rule[1:] & ~is_rule[:-1]) + is_rule[0])
+
+
+def _open_mapped(file_path: str, stack: ExitStack) -> Optional["fitz.Document"]:
+    """
+    Opens a PDF from a read-only memory map of the file. The map (and the file handle)
+    are registered on `stack` and released when it unwinds. Returns None if the file
+    cannot be mapped.
+    """
+    try:
+        with ExitStack() as mapping:
+            f = mapping.enter_context(open(file_path, "rb"))
+            mapped = mapping.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            # PyMuPDF rejects mmap objects but reads a memoryview over one without copying it
+            view = mapping.enter_context(memoryview(mapped))
+            doc = fitz.open(stream=view, filetype="pdf")
+            stack.push(mapping.pop_all())
+            return doc
+    except (OSError, ValueError, TypeError, RuntimeError) as e:
+        logger.debug(f"Memory-mapping {file_path} failed ({e}); opening it from the path instead")
+        return None
+
+
+@contextmanager
+def open_pdf(file_path: str, data: Optional[bytes] = None, use_mmap: bool = PDF_MMAP) -> Iterator["fitz.Document"]:
+    """
+    Opens a PDF for the duration of a with-block and always closes it, even on errors.
+    `data` (bytes already read by the caller) takes precedence; otherwise the file is
+    memory-mapped when `use_mmap` is set, falling back to a plain path open.
+    """
+    with ExitStack() as stack:
+        doc = None
+        if data is not None:
+            doc = fitz.open(stream=data, filetype="pdf")
+        elif use_mmap:
+            doc = _open_mapped(file_path, stack)
+        if doc is None:
+            doc = fitz.open(file_path)
+        try:
+            yield doc
+        finally:
+            doc.close()
+
+
+def prescan_pdfs(pdf_files: List[str]) -> Tuple[int, int]:
+    """
+    Classifies PDFs as digital or scanned from their first page, using PyMuPDF only.
+    Returns (digital, scanned); unreadable files are counted as scanned.
+    """
+    digital = scanned = 0
+    for pdf_path in pdf_files:
+        try:
+            with fitz.open(pdf_path) as doc:
+                is_digital = len(doc) > 0 and has_text_layer(doc[0])
+        except Exception:
+            is_digital = False
+        if is_digital:
+            digital += 1
+        else:
+            scanned += 1
+    return digital, scanned
+
 
 class PDFExtractor:
     """
     Handles robust extraction of text and spatial data from PDFs.
     """
     
-    def __init__(self):
-        # Heavy import moved here to speed up UI startup
-        import easyocr
-        logger.info("Initializing OCR Engine (EasyOCR)...")
-        # detail=1 gives us the bounding boxes
-        self.reader = easyocr.Reader(['en'], gpu=False)
+    def __init__(self, ocr_workers: int = OCR_PAGE_WORKERS, max_pending_pages: int = OCR_MAX_PENDING_PAGES,
+                 ocr_mode: str = OCR_MODE):
+        # The OCR engine is not loaded here; see the reader property
+        # Scanned pages OCR'd concurrently, and the cap on rendered pages held in memory
+        self.ocr_workers = max(1, ocr_workers)
+        self.max_pending_pages = max(self.ocr_workers, max_pending_pages)
+        # "full" OCRs whole pages, "template" only the CBP 7501 regions the parser reads
+        self.ocr_mode = ocr_mode
+
+    @property
+    def reader(self):
+        """The shared EasyOCR reader, loaded on the first scanned page."""
+        return get_ocr_reader()
 
-    def extract_structured_data(self, file_path: str) -> List[Dict[str, Any]]:
+    def extract_structured_data(self, file_path: str, data: Optional[bytes] = None,
+                                on_page: Optional[Callable[[ElementTable], bool]] = None) -> ElementTable:
         """
         Extracts text along with its bounding boxes (x, y, w, h).
-        Returns a list of elements: [{"text": str, "x": float, "y": float, "w": float, "h": float}]
+        Returns an ElementTable; iterating it gives the element dicts
+        [{"text": str, "x": float, "y": float, "w": float, "h": float, "page": int}].
+        When `data` holds the file's bytes (already read by the caller) the document is
+        opened from memory and file_path is only used for logging.
+        on_page is called with each page's elements in order; once it returns True the
+        remaining pages are skipped and the pages read so far are returned. Exceptions
+        raised by on_page propagate; only extraction failures are logged and swallowed.
         """
-        all_elements = []
+        tables: List[ElementTable] = []
+
+        def collect(table: ElementTable) -> bool:
+            tables.append(table)
+            return on_page is not None and on_page(table)
+
+        if not self.stream_pages(file_path, data, collect):
+            return ElementTable.empty()
+        return ElementTable.concat(tables)
+
+    def stream_pages(self, file_path: str, data: Optional[bytes],
+                     on_page: Callable[[ElementTable], bool]) -> bool:
+        """
+        Passes each page's elements to on_page, in order, without keeping them, so only
+        the page at hand is held. Once on_page returns True the remaining pages are skipped.
+        Returns False when extraction failed (the error is logged); exceptions raised by
+        on_page propagate.
+        """
+        extract_start = time.perf_counter()
+        done = False
         try:
-            doc = fitz.open(file_path)
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Try digital text first
-                words = page.get_text("words") # (x0, y0, x1, y1, "word", block_no, line_no, word_no)
-                
-                if len(words) > 10:
-                    # Digital PDF
-                    for w in words:
-                        all_elements.append({
-                            "text": w[4],
-                            "x": w[0],
-                            "y": w[1],
-                            "w": w[2] - w[0],
-                            "h": w[3] - w[1],
-                            "page": page_num
-                        })
-                else:
-                    # Scanned PDF - Use OCR
-                    logger.info(f"Page {page_num + 1} appears scanned. Using OCR...")
-                    ocr_results = self._perform_detailed_ocr(page)
-                    for res in ocr_results:
-                        box = res[0] # [[x1,y1], [x2,y1], [x2,y2], [x1,y2]]
-                        text = res[1]
-                        
-                        x = box[0][0]
-                        y = box[0][1]
-                        w = box[1][0] - x
-                        h = box[2][1] - y
-                        
-                        all_elements.append({
-                            "text": text,
-                            "x": x,
-                            "y": y,
-                            "w": w,
-                            "h": h,
-                            "page": page_num
-                        })
-            
-            doc.close()
-            return all_elements
-            
+            for table in self._pages_or_failure(file_path, data, lambda: done):
+                if table is None:
+                    return False
+                if on_page(table):
+                    done = True
+            return True
+        finally:
+            metrics.observe("extract", time.perf_counter() - extract_start)
+
+    def _pages_or_failure(self, file_path: str, data: Optional[bytes],
+                          should_stop: Callable[[], bool]) -> Iterator[Optional[ElementTable]]:
+        """
+        iter_pages() with extraction errors logged; a failed document ends with a None.
+        Errors raised by the consumer between pages are not caught here.
+        """
+        try:
+            if data is None:
+                metrics.incr("bytes_read", os.path.getsize(file_path))
+            yield from self.iter_pages(file_path, data, should_stop)
         except Exception as e:
             logger.error(f"Failed structured extraction from {file_path}: {e}")
-            return []
+            yield None
+
+    def iter_pages(self, file_path: str, data: Optional[bytes] = None,
+                   should_stop: Optional[Callable[[], bool]] = None) -> Iterator[ElementTable]:
+        """
+        Yields each page's elements, in page order, as soon as the page is done.
+        Only the current page and at most max_pending_pages rendered pages waiting on OCR
+        are held here; what the consumer keeps of the yielded pages is up to it. should_stop() is checked after every yielded page; once it
+        returns True the remaining pages are skipped. The document is closed when the
+        generator finishes, fails or is closed.
+        """
+        executor = None
+        # (page_num, ElementTable, or the Future of a page still being OCR'd), in page order
+        pending = deque()
+        try:
+            with ExitStack() as stack:
+                with metrics.timer("extract.open"):
+                    doc = stack.enter_context(open_pdf(file_path, data))
+                page_count = len(doc)
+                yielded = 0
+
+                for page_num in range(page_count + 1):
+                    # Hand back finished pages first (all of them after the last page);
+                    # block on OCR once too many pages are pending
+                    while pending and (page_num == page_count or self._is_ready(pending[0][1])
+                                       or len(pending) >= self.max_pending_pages):
+                        yield self._page_result(*pending.popleft())
+                        yielded += 1
+                        if yielded < page_count and should_stop is not None and should_stop():
+                            metrics.incr("pages.skipped", page_count - yielded)
+                            return
+                    if page_num == page_count:
+                        break
+
+                    # The page object (and its text page) is dropped as soon as this returns
+                    result = self._extract_page(doc[page_num], page_num)
+                    if isinstance(result, ElementTable):
+                        pending.append((page_num, result))
+                    elif self.ocr_workers == 1:
+                        pending.append((page_num, self._ocr_to_elements(self._ocr_image(result), page_num)))
+                    else:
+                        if executor is None:
+                            executor = ThreadPoolExecutor(max_workers=self.ocr_workers)
+                        pending.append((page_num, executor.submit(self._ocr_image, result)))
+                    # The pixmap now lives only as long as its OCR task
+                    result = None
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _extract_page(self, page, page_num: int) -> Union[ElementTable, "fitz.Pixmap"]:
+        """
+        Digital pages come back as their elements; scanned pages as the rendered pixmap to OCR.
+        """
+        # Try digital text first
+        with metrics.timer("extract.get_text"):
+            words = page.get_text("words") # (x0, y0, x1, y1, "word", block_no, line_no, word_no)
+
+        if len(words) > DIGITAL_MIN_WORDS:
+            # Digital PDF
+            metrics.incr("pages.digital")
+            return ElementTable.from_words(words, page_num)
+
+        # Scanned PDF - Use OCR
+        logger.info(f"Page {page_num + 1} appears scanned. Using OCR...")
+        metrics.incr("pages.ocr")
+        # Rendering stays on this thread (MuPDF documents are not thread-safe)
+        pix = self._render_page(page)
+        # Decoded scan images are cached by MuPDF; drop them so earlier pages do not pile up
+        fitz.TOOLS.store_shrink(100)
+        return ElementTable.empty() if pix is None else pix
+
+    @staticmethod
+    def _is_ready(item: Union[ElementTable, Future]) -> bool:
+        return not isinstance(item, Future) or item.done()
+
+    def _page_result(self, page_num: int, item: Union[ElementTable, Future]) -> ElementTable:
+        if isinstance(item, Future):
+            return self._ocr_to_elements(item.result(), page_num)
+        return item
+
+    def _ocr_to_elements(self, ocr_results: List, page_num: int) -> ElementTable:
+        texts, xs, ys, ws, hs = [], [], [], [], []
+        for res in ocr_results:
+            box = res[0] # [[x1,y1], [x2,y1], [x2,y2], [x1,y2]]
+            
+            # EasyOCR may hand back NumPy scalars; the table stores plain float64 columns
+            x = float(box[0][0])
+            y = float(box[0][1])
+            texts.append(res[1])
+            xs.append(x)
+            ys.append(y)
+            ws.append(float(box[1][0]) - x)
+            hs.append(float(box[2][1]) - y)
+        return ElementTable.from_columns(texts, xs, ys, ws, hs, page_num)
 
     def _perform_detailed_ocr(self, page) -> List:
         """
         Performs OCR and returns detailed bounding box info.
         """
+        pix = self._render_page(page)
+        if pix is None:
+            return []
+        return self._ocr_image(pix)
+
+    def _render_page(self, page) -> Optional["fitz.Pixmap"]:
+        """
+        Rasterizes a page to a grayscale pixmap at 2x zoom.
+        """
         try:
             mat = fitz.Matrix(2.0, 2.0) # High res for better box accuracy
-            pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY)
-            
-            img_data = pix.tobytes("png")
-            img = Image.open(io.BytesIO(img_data))
-            img_array = np.array(img)
-            
-            # detail=1 returns [[box], text, confidence]
-            results = self.reader.readtext(img_array, detail=1)
-            return results
+            with metrics.timer("extract.render"):
+                return page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY)
+        except Exception as e:
+            logger.error(f"Page rendering failed: {e}")
+            return None
+
+    @staticmethod
+    def _pixmap_to_array(pix) -> np.ndarray:
+        """
+        Wraps the pixmap's raw sample buffer as a NumPy view (no PNG round trip, no copy).
+        The returned array is only valid while `pix` is alive.
+        """
+        # samples_mv is a zero-copy memoryview; older PyMuPDF only offers the bytes copy
+        samples = getattr(pix, "samples_mv", None)
+        if samples is None:
+            samples = pix.samples
+        shape = (pix.height, pix.width, pix.n)
+        strides = (pix.stride, pix.n, 1)
+        img_array = np.ndarray(shape=shape, dtype=np.uint8, buffer=samples, strides=strides)
+        # Grayscale pages go to EasyOCR as a 2-D image
+        return img_array[:, :, 0] if pix.n == 1 else img_array
+
+    def _ocr_image(self, pix) -> List:
+        """
+        Runs EasyOCR on a rendered page. Safe to call from worker threads.
+        """
+        try:
+            with metrics.timer("extract.ocr"):
+                img_array = self._pixmap_to_array(pix)
+                if self.ocr_mode == "template":
+                    results = self._ocr_template(img_array)
+                    if results is not None:
+                        return results
+                    logger.debug("Page does not match the CBP 7501 template. Falling back to full-page OCR...")
+                # detail=1 returns [[box], text, confidence]
+                results = self.reader.readtext(img_array, detail=1)
+                return results
         except Exception as e:
             logger.error(f"Detailed OCR failed: {e}")
             return []
 
+    def _ocr_template(self, img_array: np.ndarray) -> Optional[List]:
+        """
+        Region-of-interest OCR for CBP 7501 pages.
+        Pages without the form's ruled grid are rejected before any OCR runs. Otherwise the
+        first template region doubles as a probe: if too few of its labels are found, the
+        page is not a 7501 (or is laid out differently). None is returned in both cases.
+        """
+        with metrics.timer("extract.ocr.layout"):
+            rules = count_horizontal_rules(img_array)
+        if rules < OCR_TEMPLATE_MIN_RULES:
+            return None
+
+        probe, rest = OCR_TEMPLATE_REGIONS[0], OCR_TEMPLATE_REGIONS[1:]
+        results = self._ocr_regions(img_array, [probe])
+
+        found_text = re.sub(r"[^a-z0-9]", "", " ".join(r[1] for r in results).lower())
+        matches = sum(1 for label in probe["labels"] if re.sub(r"[^a-z0-9]", "", label.lower()) in found_text)
+        if matches < OCR_TEMPLATE_MIN_MATCHES:
+            return None
+
+        return results + self._ocr_regions(img_array, rest)
+
+    def _ocr_regions(self, img_array: np.ndarray, regions: List[Dict[str, Any]]) -> List:
+        """
+        OCRs only the given page regions; boxes are mapped back to full-page coordinates.
+        """
+        height, width = img_array.shape[:2]
+        results = []
+        for region in regions:
+            x0, y0, x1, y1 = region["box"]
+            left, top = int(x0 * width), int(y0 * height)
+            crop = np.ascontiguousarray(img_array[top:int(y1 * height), left:int(x1 * width)])
+            if crop.size == 0:
+                continue
+            for box, text, conf in self.reader.readtext(crop, detail=1):
+                box = [[px + left, py + top] for px, py in box]
+                results.append((box, text, conf))
+        return results
+
     # Keeping legacy method for compatibility if needed, but redirects to structured
     def extract_text(self, file_path: str) -> str:
         elements = self.extract_structured_data(file_path)
-        return " ".join([e['text'] for e in elements])
+        return " ".join(elements.text)
@@ -0,0 +1,99 @@
+import os
+import json
+from typing import Optional, Dict, Any
+from loguru import logger
+
+from src.cache import cache_fingerprint
+
+
+class RunJournal:
+    """
+    Durable, append-only JSONL checkpoint of the files a batch run has completed.
+    Each line records one file (name, size, mtime) and its parsed fields, and is fsynced
+    before the next file is reported, so a crash or "Stop & Export" loses nothing.
+    A new run over the same folder resumes from the journal; a run that completes
+    deletes it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fingerprint = cache_fingerprint()
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fresh = not self.entries
+        self.file = open(path, "w" if fresh else "a", encoding="utf-8")
+        if fresh:
+            self._append({"fingerprint": self.fingerprint})
+        else:
+            if not self._ends_with_newline():
+                # Terminate a half-written last line so the next entry starts cleanly
+                self.file.write("\n")
+            logger.info(f"Resuming previous run: {len(self.entries)} files already completed.")
+
+    @staticmethod
+    def file_key(pdf_path: str) -> str:
+        stat = os.stat(pdf_path)
+        return f"{os.path.basename(pdf_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+
+        entries = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half-written
+                    continue
+                if line_no == 0:
+                    if entry.get("fingerprint") != self.fingerprint:
+                        logger.info("Discarding checkpoint from an older parser/extractor version.")
+                        return {}
+                    continue
+                entries[entry["key"]] = entry
+        return entries
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def lookup(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the journal entry for an unchanged, already completed file (or None).
+        entry["data"] is the parsed field dict, or None when nothing was extracted.
+        """
+        if not self.entries:
+            return None
+        try:
+            return self.entries.get(self.file_key(pdf_path))
+        except OSError:
+            return None
+
+    def record(self, pdf_path: str, data: Optional[Dict[str, Any]]):
+        entry = {"key": self.file_key(pdf_path), "data": data}
+        self._append(entry)
+        self.entries[entry["key"]] = entry
+
+    def _append(self, entry: Dict[str, Any]):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """Keeps the journal on disk so the next run can resume."""
+        self.file.close()
+
+    def finish(self):
+        """The run completed: the checkpoint is no longer needed."""
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -1,19 +1,106 @@
 import os
 import glob
+import time
+import argparse
 from tqdm import tqdm
 from loguru import logger
-from src.extractor import PDFExtractor
-from src.parser import InvoiceParser
-from src.exporter import ExcelExporter
-from src.config import INPUT_FOLDER, OUTPUT_FOLDER, OUTPUT_FILENAME
+from src.pool import ExtractionPool
+from src.async_ingest import AsyncExtractionPool
+from src.exporter import ExcelExporter, EXPORT_FORMATS, with_format_extension
+from src.cache import ResultCache
+from src.journal import RunJournal
+from src.dedupe import DuplicateIndex
+from src.daemon import connect_daemon
+from src.metrics import metrics
+from src.profiling import FileProfiler
+from src.watcher import FolderWatcher, WatchState, open_batch_writer
+from src.pipeline import Pipeline
+from src.config import (INPUT_FOLDER, OUTPUT_FOLDER, OUTPUT_FILENAME, POOL_WORKERS,
+                        CACHE_ENABLED, CACHE_FILENAME, EXPORT_STREAMING, EXPORT_FORMAT,
+                        JOURNAL_ENABLED, JOURNAL_FILENAME, DUPLICATE_KEYS, DAEMON_ENABLED,
+                        METRICS_ENABLED, METRICS_FILENAME, PROFILE_DIRNAME, PROFILE_TOP_N,
+                        PROFILE_KEEP_SLOWEST, ASYNC_INGEST)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch-process CBP 7501 invoices into a consolidated export file.")
+    parser.add_argument("--workers", type=int, default=POOL_WORKERS,
+                        help="Number of extraction processes (1 = in-process, 0 = one per CPU core).")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=EXPORT_FORMAT,
+                        help="Output file format.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-extract every PDF instead of reusing cached results.")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Drop all cached results before processing.")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Drop invoices that duplicate one already processed in this run.")
+    parser.add_argument("--duplicate-keys", default=",".join(DUPLICATE_KEYS or []),
+                        help="Comma-separated fields that identify a duplicate "
+                             "(default: every field except id/filename).")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint of an interrupted run and start from the first file.")
+    parser.add_argument("--daemon", action="store_true", default=DAEMON_ENABLED,
+                        help="Send extraction to a running extraction daemon (python -m src.daemon).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each file (cProfile) and write a hotspot report to the output folder.")
+    parser.add_argument("--profile-top", type=int, default=PROFILE_TOP_N,
+                        help="Functions listed in the hotspot report.")
+    parser.add_argument("--profile-keep", type=int, default=PROFILE_KEEP_SLOWEST,
+                        help="Number of slowest files whose profiles are kept.")
+    parser.add_argument("--async-io", action="store_true", default=ASYNC_INGEST,
+                        help="Read PDFs ahead concurrently while others are extracted (for slow network shares).")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and process new or changed PDFs as they arrive in the input folder.")
+    return parser.parse_args()
+
+def run_batch(pdf_files, output_file, pipeline, exporter):
+    extracted_data = []
+    # Streaming mode writes each row as it arrives instead of collecting extracted_data
+    writer = exporter.open_stream(output_file) if EXPORT_STREAMING else None
+
+    # Process files with a progress bar (results arrive in input order)
+    results = pipeline.run(pdf_files, writer=writer)
+    for _, record, _ in tqdm(results, total=len(pdf_files), desc="Processing Invoices"):
+        if record is not None and writer is None:
+            extracted_data.append(record)
+
+    # 3. Export
+    if writer:
+        writer.close()
+    else:
+        exporter.export(extracted_data, output_file)
+
+def watch_folder(input_dir, output_file, pipeline, exporter):
+    """Processes PDFs as they appear in input_dir until interrupted (Ctrl+C)."""
+    # Files exported by an earlier session are skipped and their ids are not reused
+    state = WatchState(output_file)
+    watcher = FolderWatcher(input_dir, processed=state.signatures(input_dir))
+    try:
+        for batch in watcher.watch():
+            logger.info(f"{len(batch)} new or changed PDF file(s) detected.")
+            # Edited files: their earlier row is removed so the new one replaces it
+            state.replace(batch)
+            # Each batch is appended (csv/jsonl) or saved as its own part file, never a full rewrite
+            writer = open_batch_writer(exporter, output_file)
+            results = []
+            try:
+                for pdf_path, _, stats in pipeline.run(batch, writer=writer, first_id=state.next_id):
+                    results.append((pdf_path, stats))
+            finally:
+                writer.close()
+                # Also after Ctrl+C mid-batch: whatever was written is not exported again
+                state.record(results, watcher.processed, writer.output_path)
+    except KeyboardInterrupt:
+        logger.info("Watch mode stopped.")
 
 def main():
+    args = parse_args()
+
     # Setup paths
     # Assuming the script is run from the root of the project or src parent
     # Adjust paths to be absolute or relative to CWD
     base_dir = os.getcwd()
     input_dir = os.path.join(base_dir, INPUT_FOLDER)
-    output_file = os.path.join(base_dir, OUTPUT_FOLDER, OUTPUT_FILENAME)
+    output_file = with_format_extension(os.path.join(base_dir, OUTPUT_FOLDER, OUTPUT_FILENAME), args.format)
 
     logger.info(f"Starting Invoice Processing...")
     logger.info(f"Input Directory: {input_dir}")
@@ -23,43 +110,71 @@ def main():
         logger.error(f"Input directory '{input_dir}' does not exist. Please create it and add PDF files.")
         return
 
-    # Get all PDF files
-    pdf_files = glob.glob(os.path.join(input_dir, "*.pdf"))
+    # Get all PDF files (sorted so ids are stable between runs)
+    pdf_files = sorted(glob.glob(os.path.join(input_dir, "*.pdf")))
     logger.info(f"Found {len(pdf_files)} PDF files.")
 
-    if not pdf_files:
+    if not pdf_files and not args.watch:
         logger.warning("No PDF files found to process.")
         return
 
+    run_start = time.perf_counter()
+
     # Initialize components
-    extractor = PDFExtractor()
-    parser = InvoiceParser()
+    cache = None
+    if CACHE_ENABLED and not args.no_cache:
+        cache = ResultCache(os.path.join(base_dir, OUTPUT_FOLDER, CACHE_FILENAME))
+        if args.clear_cache:
+            cache.clear()
+    journal = None
+    # Watch mode never completes a run, so there is nothing to resume; profiling must measure
+    # every file, so it neither resumes from nor touches an existing checkpoint
+    if JOURNAL_ENABLED and not args.watch and not args.profile:
+        journal_path = os.path.join(base_dir, OUTPUT_FOLDER, JOURNAL_FILENAME)
+        if args.restart and os.path.exists(journal_path):
+            os.remove(journal_path)
+        journal = RunJournal(journal_path)
+    daemon = None
+    if args.daemon:
+        daemon = connect_daemon()
+        if daemon is None:
+            logger.warning("Extraction daemon not running - extracting locally.")
+    profiler = None
+    if args.profile:
+        # Cached files are skipped, so profiling re-extracts everything
+        if cache:
+            cache.close()
+            cache = None
+        profiler = FileProfiler(os.path.join(base_dir, OUTPUT_FOLDER, PROFILE_DIRNAME),
+                                args.profile_top, args.profile_keep)
+    pool_cls = AsyncExtractionPool if args.async_io else ExtractionPool
+    pool = pool_cls(workers=args.workers, cache=cache, journal=journal, daemon=daemon, profiler=profiler)
     exporter = ExcelExporter()
 
-    extracted_data = []
+    duplicates = None
+    if args.dedupe:
+        keys = [k.strip() for k in args.duplicate_keys.split(",") if k.strip()]
+        duplicates = DuplicateIndex(keys or None)
+
+    pipeline = Pipeline(pool, duplicates)
+    if args.watch:
+        watch_folder(input_dir, output_file, pipeline, exporter)
+    else:
+        run_batch(pdf_files, output_file, pipeline, exporter)
 
-    # Process files with a progress bar
-    for i, pdf_path in enumerate(tqdm(pdf_files, desc="Processing Invoices"), start=1):
-        filename = os.path.basename(pdf_path)
-        logger.debug(f"Processing {filename}")
-        
-        # 1. Extract Text
-        text = extractor.extract_text(pdf_path)
-        if not text:
-            logger.warning(f"Skipping {filename} - No text extracted (might be image-based PDF).")
-            continue
-            
-        # 2. Parse Text
-        invoice_data = parser.parse(text)
-        
-        # Add metadata
-        invoice_data['id'] = i  # Simple sequential ID
-        invoice_data['filename'] = filename
-        
-        extracted_data.append(invoice_data)
-
-    # 3. Export to Excel
-    exporter.export(extracted_data, output_file)
+    if cache:
+        cache.close()
+    if daemon:
+        daemon.close()
+    if journal:
+        # Every file went through: the checkpoint is no longer needed
+        journal.finish()
+    if profiler:
+        profiler.report()
+    if METRICS_ENABLED:
+        metrics_path = os.path.join(base_dir, OUTPUT_FOLDER, METRICS_FILENAME)
+        metrics.write(metrics_path, time.perf_counter() - run_start)
+        logger.info(f"Run metrics written to {metrics_path}")
     logger.info("Processing complete.")
 
 if __name__ == "__main__":
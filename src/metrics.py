@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+from loguru import logger
+
+from src.config import METRICS_ENABLED
+
+
+class Metrics:
+    """
+    Lightweight, thread-safe stage timers and counters for one process.
+    Timers keep count/total/max only, so recording is O(1) and snapshots from
+    worker processes can be merged into the parent's run summary.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.timers: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                self.timers[name] = {"count": 1, "total_s": seconds, "max_s": seconds}
+            else:
+                t["count"] += 1
+                t["total_s"] += seconds
+                if seconds > t["max_s"]:
+                    t["max_s"] = seconds
+
+    def incr(self, name: str, amount: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"counters": dict(self.counters),
+                    "timers": {name: dict(t) for name, t in self.timers.items()}}
+
+    def merge(self, snapshot: Optional[Dict[str, Any]]):
+        """Adds a snapshot taken in another process (e.g. a pool worker)."""
+        if not snapshot or not self.enabled:
+            return
+        with self._lock:
+            for name, value in snapshot.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, other in snapshot.get("timers", {}).items():
+                t = self.timers.get(name)
+                if t is None:
+                    self.timers[name] = dict(other)
+                else:
+                    t["count"] += other["count"]
+                    t["total_s"] += other["total_s"]
+                    t["max_s"] = max(t["max_s"], other["max_s"])
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+    def summary(self, wall_time_s: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run summary: counters, per-stage totals/means and derived throughput.
+        """
+        snap = self.snapshot()
+        for t in snap["timers"].values():
+            t["mean_ms"] = t["total_s"] / t["count"] * 1000 if t["count"] else 0.0
+        counters = snap["counters"]
+        pages = counters.get("pages.digital", 0) + counters.get("pages.ocr", 0)
+        if wall_time_s:
+            snap["wall_time_s"] = wall_time_s
+            snap["pages_per_sec"] = pages / wall_time_s
+            snap["files_per_sec"] = counters.get("files", 0) / wall_time_s
+        return snap
+
+    def write(self, path: str, wall_time_s: Optional[float] = None) -> Dict[str, Any]:
+        """Writes the run summary as JSON and logs the slowest stages."""
+        summary = self.summary(wall_time_s)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+        slowest = sorted(summary["timers"].items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:5]
+        logger.info("Stage times: " + ", ".join(f"{name} {t['total_s']:.2f}s" for name, t in slowest))
+        return summary
+
+
+# Process-wide registry used by the extractor, parser, exporter and drivers
+metrics = Metrics()
@@ -1,48 +1,135 @@
 import re
-from typing import Dict, Any, List, Optional
+import json
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 
+from src.config import PARSER_ENGINE, PARSER_SOURCES, EARLY_EXIT_FIELDS
+from src.spatial import SpatialResolver
+from src.metrics import metrics
+from src.elements import ElementTable
+
+# Bump when a change alters the parsed fields for the same input (invalidates the result cache)
+PARSER_VERSION = "1.2"
+
+# Output column holding the source boxes of the spatially resolved fields (PARSER_SOURCES)
+SOURCES_COLUMN = "Sources"
+
+class AnchorIndex:
+    """
+    Positions of every box-number anchor and numbered box label in a text stream.
+    blocks: box number -> offsets just past each "10." / "35 " anchor
+    labels: label key  -> offsets just past each "3. Summary Date" / "37 Duty" label
+    """
+    __slots__ = ("blocks", "labels")
+
+    def __init__(self):
+        self.blocks: Dict[str, List[int]] = defaultdict(list)
+        self.labels: Dict[str, List[int]] = defaultdict(list)
+
 class InvoiceParser:
     """
     Advanced Parser for CBP 7501 (Entry Summary) forms.
     Uses windowed-regex picking for high precision on jumbled OCR streams.
+    All patterns are compiled once; each parse scans the text once to index every
+    box anchor, then resolves each field from that index.
     """
 
+    # A box number ("10", "35") followed by its separator, optionally followed by a box label.
+    # (?!\d) rather than \b after the number, so labels glued to it ("37Duty") still match
+    _ANCHOR_RE = re.compile(
+        r"\b(?P<block>\d{1,2})(?!\d)(?P<sep>[\.\s]*)"
+        r"(?P<label>Summary\s*Date|Entry\s*Date|Import\s*Date|Export\s*Date|Duty|Tax|Other|Total)?",
+        re.IGNORECASE)
+    # Separator allowed between a box number and its label ("3. Summary Date", "37Duty")
+    _LABEL_SEP_RE = re.compile(r"\.?\s*")
+    # Box anchors only consume up to 5 separator characters before their value window starts
+    _MAX_BLOCK_SEP = 5
+    # Label key (lowercase, no whitespace) -> the box number it must carry
+    _LABEL_BLOCKS = {
+        "summarydate": "3", "entrydate": "7", "importdate": "11", "exportdate": "15",
+        "duty": "37", "tax": "38", "other": "39", "total": "40",
+    }
+
+    _COUNTRY_RE = re.compile(r"\b([A-Z]{2}|MULTI)\b")
+    _ENTERED_VALUE_RE = re.compile(r"(?:499\s+)?(?:\$?\s*)([\d,]{3,12})")
+    _ENTERED_VALUE_AFTER_499_RE = re.compile(r"(?:499\s+).*?([\d,]{3,12})")
+    _DATE_AFTER_LABEL_RE = re.compile(r".{0,40}?(\d{1,2}[\/\.\-]\d{1,2}[\/\.\-]\d{2,4})")
+    _AMOUNT_RE = re.compile(r"\d+\.\d{2}")
+    _WAYBILL_RE = re.compile(r"\b\d{3}-\d{7,10}\b")
+    _INVOICE_RES = (
+        re.compile(r"Invoice\s*(?:#|No|Number)[:\s]+([A-Z0-9\-]{5,})", re.IGNORECASE),
+        re.compile(r"Commercial\s*Invoice\s*(?:#|No)[:\s]+([A-Z0-9\-]{5,})", re.IGNORECASE),
+        re.compile(r"Exporter\s*No[:\s]+([A-Z0-9\-]{5,})", re.IGNORECASE),
+    )
+
+    def __init__(self, engine: str = PARSER_ENGINE, sources: bool = PARSER_SOURCES):
+        # "text" = windowed regex over the joined stream, "spatial" = label/value geometry first
+        self.engine = engine
+        # Adds the Sources column (spatial engine only)
+        self.sources = sources and engine == "spatial"
+
     def parse(self, input_data: Any) -> Dict[str, Any]:
-        if isinstance(input_data, list):
+        data, sources = self.parse_with_sources(input_data)
+        return self.attach_sources(data, sources)
+
+    def attach_sources(self, data: Dict[str, Any], sources: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Stores the source boxes in data's Sources column as JSON, when enabled."""
+        if self.sources:
+            data[SOURCES_COLUMN] = json.dumps(sources, sort_keys=True) if sources else ""
+        return data
+
+    def parse_with_sources(self, input_data: Any) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Like parse(), but also returns the source box ({"page", "x", "y", "w", "h", "text"})
+        of every field resolved by the spatial engine, for auditing.
+        """
+        with metrics.timer("parse"):
+            return self._parse_with_sources(input_data)
+
+    def _parse_with_sources(self, input_data: Any) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        if isinstance(input_data, (list, ElementTable)):
             # Convert structured elements to a single text stream for windowed parsing
-            # We sort by Y then X to keep rows together
-            sorted_elements = sorted(input_data, key=lambda x: (x['page'], x['y'], x['x']))
-            raw_text = " ".join([e['text'] for e in sorted_elements])
-            return self._parse_with_logic(raw_text)
+            # We sort by page, then Y, then X (np.lexsort) to keep rows together
+            table = input_data if isinstance(input_data, ElementTable) else ElementTable.from_dicts(input_data)
+            raw_text = table.joined_text()
+            data = self._parse_with_logic(raw_text)
+            if self.engine == "spatial":
+                # Spatial hits win; the text logic fills whatever has no locatable label
+                elements = input_data if isinstance(input_data, list) else table.to_dicts()
+                spatial_data, sources = SpatialResolver().resolve(elements)
+                data.update(spatial_data)
+                return data, sources
+            return data, {}
         else:
-            return self._parse_with_logic(input_data)
+            return self._parse_with_logic(input_data), {}
 
     def _parse_with_logic(self, text: str) -> Dict[str, Any]:
         data = {}
+        index = self._build_anchor_index(text)
         
         # 1. Countries (Box 10, 11/14) - Keeping refined block logic for "wrong" values
-        data["Country of Origin"] = self._extract_by_block(text, r"10", r"\b([A-Z]{2}|MULTI)\b")
-        exp_country = self._extract_by_block(text, r"14", r"\b([A-Z]{2}|MULTI)\b")
+        data["Country of Origin"] = self._extract_by_block(text, index, "10", self._COUNTRY_RE)
+        exp_country = self._extract_by_block(text, index, "14", self._COUNTRY_RE)
         if not exp_country:
-             exp_country = self._extract_by_block(text, r"11", r"\b([A-Z]{2}|MULTI)\b")
+             exp_country = self._extract_by_block(text, index, "11", self._COUNTRY_RE)
         data["Exporting Country"] = exp_country
         
         # 2. Waybill (Box 12) - Reverted to Label Logic
         data["Waybill Number"] = self._extract_waybill(text)
         
         # 3. Dates (Box 3, 7, 11, 15) - Reverted to Label Logic
-        data["Summary Date"] = self._extract_date(text, r"3\.?\s*Summary\s*Date")
-        data["Entry Date"] = self._extract_date(text, r"7\.?\s*Entry\s*Date")
-        data["Import Date"] = self._extract_date(text, r"11\.?\s*Import\s*Date")
-        data["Export Date"] = self._extract_date(text, r"15\.?\s*Export\s*Date")
+        data["Summary Date"] = self._extract_date(text, index, "summarydate")
+        data["Entry Date"] = self._extract_date(text, index, "entrydate")
+        data["Import Date"] = self._extract_date(text, index, "importdate")
+        data["Export Date"] = self._extract_date(text, index, "exportdate")
         
         # 4. Entered Value (Box 35) - Keeping refined logic for "wrong" values
-        entered_val_raw = self._extract_by_block(text, r"35", r"(?:499\s+)?(?:\$?\s*)([\d,]{3,12})")
+        entered_val_raw = self._extract_by_block(text, index, "35", self._ENTERED_VALUE_RE)
         if entered_val_raw:
             clean_val = entered_val_raw.replace(",", "").replace("$", "").strip()
             if clean_val == "499":
-                entered_val_raw = self._extract_by_block(text, r"35", r"(?:499\s+).*?([\d,]{3,12})", window=120)
+                entered_val_raw = self._extract_by_block(text, index, "35", self._ENTERED_VALUE_AFTER_499_RE, window=120)
                 if entered_val_raw:
                     clean_val = entered_val_raw.replace(",", "").replace("$", "").strip()
             data["Total Entered Value"] = clean_val
@@ -50,78 +137,118 @@ class InvoiceParser:
             data["Total Entered Value"] = ""
         
         # 5. Financials (Box 37-40) - Reverted to Label Logic
-        data["Duty"] = self._extract_amount_near_label(text, r"37\.?\s*Duty", window=60)
-        data["Tax"]  = self._extract_amount_near_label(text, r"38\.?\s*Tax", window=60)
-        data["Other"] = self._extract_amount_near_label(text, r"39\.?\s*Other", window=60)
-        data["Total"] = self._extract_amount_near_label(text, r"40\.?\s*Total", window=150)
+        data["Duty"] = self._extract_amount_near_label(text, index, "duty", window=60)
+        data["Tax"]  = self._extract_amount_near_label(text, index, "tax", window=60)
+        data["Other"] = self._extract_amount_near_label(text, index, "other", window=60)
+        data["Total"] = self._extract_amount_near_label(text, index, "total", window=150)
 
         # 6. Global fields
         data["Invoice Number"] = self._find_invoice_number(text)
         
         return data
 
-        # 6. Global fields
-        data["Invoice Number"] = self._find_invoice_number(text)
-        
-        return data
+    def _build_anchor_index(self, text: str) -> AnchorIndex:
+        """
+        Single pass over the text collecting every box-number anchor and box label.
+        """
+        index = AnchorIndex()
+        for m in self._ANCHOR_RE.finditer(text):
+            block, sep, label = m.group("block"), m.group("sep"), m.group("label")
+
+            # Block anchor: the number plus 1-5 separator characters (e.g. "10." or "35 ")
+            if sep:
+                index.blocks[block].append(m.start("sep") + min(len(sep), self._MAX_BLOCK_SEP))
 
-    def _extract_by_block(self, text: str, block_no: str, value_pattern: str, window: int = 80) -> str:
+            # Label: only counts when it carries its own box number ("37 Duty", not "12 Duty")
+            if label:
+                key = re.sub(r"\s+", "", label).lower()
+                if self._LABEL_BLOCKS.get(key) == block and self._LABEL_SEP_RE.fullmatch(sep):
+                    index.labels[key].append(m.end("label"))
+        return index
+
+    def _extract_by_block(self, text: str, index: AnchorIndex, block_no: str,
+                          value_re: "re.Pattern", window: int = 80) -> str:
         """
         New Anchor Logic: Finds a block number (like '10.') and looks for the 
         target pattern immediately following it within a small window.
         """
-        # Look for the block number as a standalone digit (e.g. "10 " or "10.")
-        anchor_pattern = rf"\b{block_no}\b[\.\s]{{1,5}}"
-        matches = list(re.finditer(anchor_pattern, text))
-        
-        if not matches:
-            return ""
-
         # Use the LAST occurrence of the block number (usually where the data is)
         # or the one that yields a match.
-        for m in reversed(matches):
-            start_pos = m.end()
-            window_text = text[start_pos : start_pos + window]
-            
-            val_match = re.search(value_pattern, window_text)
+        for start_pos in reversed(index.blocks.get(block_no, ())):
+            val_match = value_re.search(text, start_pos, start_pos + window)
             if val_match:
                 return val_match.group(1).strip()
         
         return ""
 
-    def _extract_amount_near_label(self, text: str, label_pattern: str, window: int = 100) -> str:
+    def _extract_amount_near_label(self, text: str, index: AnchorIndex, label: str, window: int = 100) -> str:
         """Fallback method for standard labels."""
-        pattern = rf"{label_pattern}(.{{0,{window}}})"
-        m = re.search(pattern, text, re.IGNORECASE)
-        if not m: return ""
-        window_text = m.group(1)
-        numbers = re.findall(r"\d+\.\d{2}", window_text)
+        positions = index.labels.get(label)
+        if not positions: return ""
+        # The window runs from the first label occurrence up to `window` chars or the end of the line
+        start = positions[0]
+        stop = start + window
+        newline = text.find("\n", start, stop)
+        if newline != -1:
+            stop = newline
+        numbers = self._AMOUNT_RE.findall(text, start, stop)
         return numbers[-1] if numbers else ""
 
-    def _extract_country_code(self, text: str, label_pattern: str) -> str:
-        """Fallback method for country code labels."""
-        pattern = rf"{label_pattern}.{{0,100}}?\b([A-Z]{{2}})\b"
-        m = re.search(pattern, text, re.IGNORECASE)
-        return m.group(1) if m else ""
-
     def _extract_waybill(self, text: str) -> str:
         """Standard AWB pattern."""
-        m = re.search(r"\b\d{3}-\d{7,10}\b", text)
+        m = self._WAYBILL_RE.search(text)
         return m.group(0) if m else ""
 
-    def _extract_date(self, text: str, label_pattern: str) -> str:
+    def _extract_date(self, text: str, index: AnchorIndex, label: str) -> str:
         """Standard Date pattern search."""
-        pattern = rf"{label_pattern}.{{0,40}}?(\d{{1,2}}[\/\.\-]\d{{1,2}}[\/\.\-]\d{{2,4}})"
-        m = re.search(pattern, text, re.IGNORECASE)
-        return m.group(1) if m else ""
+        for start_pos in index.labels.get(label, ()):
+            m = self._DATE_AFTER_LABEL_RE.match(text, start_pos)
+            if m: return m.group(1)
+        return ""
 
     def _find_invoice_number(self, text: str) -> str:
-        patterns = [
-            r"Invoice\s*(?:#|No|Number)[:\s]+([A-Z0-9\-]{5,})",
-            r"Commercial\s*Invoice\s*(?:#|No)[:\s]+([A-Z0-9\-]{5,})",
-            r"Exporter\s*No[:\s]+([A-Z0-9\-]{5,})"
-        ]
-        for p in patterns:
-            m = re.search(p, text, re.IGNORECASE)
+        for p in self._INVOICE_RES:
+            m = p.search(text)
             if m: return m.group(1).strip()
         return ""
+
+
+class IncrementalParse:
+    """
+    Parses a document page by page, for early exit.
+    Each fed page is parsed together with the previous one (for values split across a page
+    break) and fills only the fields still empty: the first page that yields a value wins.
+    missing_fields() lists the required fields still empty; feed() returns True once none are.
+    """
+
+    def __init__(self, parser: InvoiceParser, required: Optional[List[str]] = None):
+        self.parser = parser
+        self.required = list(EARLY_EXIT_FIELDS if required is None else required)
+        self.data: Dict[str, Any] = {}
+        # Source boxes of the fields taken so far (spatial engine)
+        self.sources: Dict[str, Dict[str, Any]] = {}
+        # Words seen so far (0 = nothing extracted), and the last page that had any
+        self.words = 0
+        self._previous: Optional[ElementTable] = None
+
+    def feed(self, page: ElementTable) -> bool:
+        # A blank page cannot fill a field
+        if len(page):
+            self.words += len(page)
+            window = page if self._previous is None else ElementTable.concat([self._previous, page])
+            fields, sources = self.parser.parse_with_sources(window)
+            for field, value in fields.items():
+                if not self.data.get(field):
+                    self.data[field] = value
+                    if field in sources:
+                        self.sources[field] = sources[field]
+            self.parser.attach_sources(self.data, self.sources)
+            self._previous = page
+        return self.complete
+
+    def missing_fields(self) -> List[str]:
+        return [field for field in self.required if not self.data.get(field)]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing_fields()
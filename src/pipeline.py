@@ -0,0 +1,106 @@
+import os
+import queue
+import threading
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+from loguru import logger
+
+from src.config import PIPELINE_QUEUE_SIZE
+
+# End of the extraction stream
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Streaming extract -> parse -> export pipeline shared by the CLI and the GUI.
+
+    Extraction and parsing run in a background thread (through ExtractionPool, so
+    in-process or across worker processes) and hand results to the caller's thread
+    through a bounded queue. Records are exported as they are consumed: a slow writer
+    fills the queue, which blocks extraction instead of letting results pile up.
+    """
+
+    def __init__(self, pool, duplicates=None, queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.pool = pool
+        # Optional DuplicateIndex; duplicates are reported but never exported
+        self.duplicates = duplicates
+        self.queue_size = max(1, queue_size)
+
+    def run(self, pdf_files: List[str], writer=None, should_stop: Optional[Callable[[], bool]] = None,
+            first_id: int = 1) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Lazily yields (pdf_path, record, stats) per file, in input order.
+        record is the exported row (with id/filename) or None when the file failed,
+        produced nothing or duplicates an earlier one; stats says which:
+        {"id", "filename", "error", "empty", "duplicate_of", "written"}.
+        Closing the iterator early stops extraction.
+        """
+        should_stop = should_stop or (lambda: False)
+        stop = threading.Event()
+        results: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+
+        def put(item) -> bool:
+            # Blocks while the queue is full (backpressure) but gives up once the consumer is gone
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for item in self.pool.imap(pdf_files, should_stop=lambda: stop.is_set() or should_stop()):
+                    if not put(item):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(_DONE)
+
+        producer = threading.Thread(target=produce, name="pipeline-extract", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                i, pdf_path, data, error = item
+                record, stats = self._export(first_id + i - 1, pdf_path, data, error, writer)
+                yield pdf_path, record, stats
+        finally:
+            stop.set()
+            producer.join()
+
+    def _export(self, file_id: int, pdf_path: str, data: Optional[Dict[str, Any]], error: Optional[str],
+                writer) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        filename = os.path.basename(pdf_path)
+        stats = {"id": file_id, "filename": filename, "error": error, "empty": False,
+                 "duplicate_of": None, "written": False}
+
+        if error:
+            logger.error(f"Error processing {filename}: {error}")
+            return None, stats
+        if not data:
+            logger.warning(f"Skipping {filename} - No text extracted.")
+            stats["empty"] = True
+            return None, stats
+
+        # Add metadata
+        data['id'] = file_id
+        data['filename'] = filename
+
+        if self.duplicates is not None:
+            original = self.duplicates.check(data)
+            if original is not None:
+                logger.warning(f"Skipping {filename} - duplicate of {original}.")
+                stats["duplicate_of"] = original
+                return None, stats
+
+        if writer is not None:
+            writer.write(data)
+            stats["written"] = True
+        return data, stats
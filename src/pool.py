@@ -0,0 +1,274 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional, List, Dict, Any, Callable, Iterator, Tuple
+from loguru import logger
+
+from src.cache import file_hash
+from src.metrics import metrics
+from src.config import POOL_WORKERS, OCR_PRESCAN, EARLY_EXIT
+
+# Per-process components. Built once by _init_worker and reused for every file
+# the process handles, so each worker pays the EasyOCR model load at most once.
+_extractor = None
+_parser = None
+
+
+def resolve_worker_count(workers: int) -> int:
+    """
+    Turns a configured worker count into a concrete one (0 = one per CPU core).
+    """
+    if workers <= 0:
+        return max(1, os.cpu_count() or 1)
+    return workers
+
+
+def process_file(extractor, parser, pdf_path: str, pdf_bytes: Optional[bytes] = None,
+                 early_exit: bool = EARLY_EXIT, keep_elements: bool = True
+                 ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+    """
+    Extracts and parses a single PDF (from pdf_bytes when the caller already read it).
+    Returns (elements, data); data is None when nothing could be extracted.
+    With early_exit, pages are parsed as they are extracted and extraction stops once every
+    required field is filled (the returned elements then cover only the pages read). If the
+    caller does not need the elements (keep_elements=False, i.e. no cache) they are not
+    collected at all and None is returned in their place, so only the current and previous
+    page are held.
+    Without early_exit the whole document's words are collected, since the parser reads
+    the document as one text stream.
+    """
+    metrics.incr("files")
+    with metrics.timer("file"):
+        # A DaemonClient only extracts whole documents, so early exit needs a local extractor
+        if early_exit and hasattr(extractor, "iter_pages"):
+            from src.parser import IncrementalParse
+
+            progress = IncrementalParse(parser)
+            structured_data = None
+            if keep_elements:
+                structured_data = extractor.extract_structured_data(pdf_path, pdf_bytes, on_page=progress.feed)
+                extracted = bool(structured_data)
+            else:
+                extracted = extractor.stream_pages(pdf_path, pdf_bytes, progress.feed)
+            if not extracted or not progress.words:
+                return structured_data, None
+            missing = progress.missing_fields()
+            if missing:
+                logger.debug(f"{os.path.basename(pdf_path)}: no value for {', '.join(missing)}")
+            return structured_data, progress.data
+
+        if pdf_bytes is not None:
+            structured_data = extractor.extract_structured_data(pdf_path, pdf_bytes)
+        else:
+            structured_data = extractor.extract_structured_data(pdf_path)
+        if not structured_data:
+            return structured_data, None
+        return structured_data, parser.parse(structured_data)
+
+
+def _init_worker(preload_ocr: bool = False):
+    global _extractor, _parser
+    # Each worker stays single-threaded; the pool itself provides the parallelism
+    os.environ["OMP_NUM_THREADS"] = "1"
+    os.environ["TORCH_NUM_THREADS"] = "1"
+
+    from src.extractor import PDFExtractor, get_ocr_reader
+    from src.parser import InvoiceParser
+
+    _extractor = PDFExtractor()
+    _parser = InvoiceParser()
+    if preload_ocr:
+        get_ocr_reader()
+
+
+def _process_in_worker(pdf_path: str, keep_elements: bool, pdf_bytes: Optional[bytes] = None):
+    # Per-file metrics travel back with the result and are merged into the parent's registry
+    metrics.reset()
+    elements, data = process_file(_extractor, _parser, pdf_path, pdf_bytes, keep_elements=keep_elements)
+    # Elements only cross the process boundary when the parent needs them (for the cache)
+    return (elements if keep_elements else None), data, metrics.snapshot()
+
+
+class ExtractionPool:
+    """
+    Runs extraction + parsing over a batch of PDFs, either in-process or across
+    a pool of worker processes. Results are always yielded in input order.
+    """
+
+    def __init__(self, workers: int = POOL_WORKERS, cache=None, journal=None, prescan: bool = OCR_PRESCAN,
+                 daemon=None, profiler=None):
+        self.workers = resolve_worker_count(workers)
+        # Optional ResultCache and RunJournal; both are only touched from this (parent) process
+        self.cache = cache
+        self.journal = journal
+        self.prescan = prescan
+        # Optional DaemonClient: extraction is sent to the resident daemon instead of local workers
+        self.daemon = daemon
+        # Optional FileProfiler: every extracted file is profiled, which needs in-process execution
+        self.profiler = profiler
+        # Cache lookups made by the pre-scan, reused by the main loop so each file is hashed once
+        self._lookups: Dict[str, Tuple[Optional[str], Optional[Dict[str, Any]]]] = {}
+
+    def imap(self, pdf_files: List[str],
+             should_stop: Optional[Callable[[], bool]] = None
+             ) -> Iterator[Tuple[int, str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Yields (index, pdf_path, data, error) for each file, index starting at 1.
+        `data` is None when extraction produced nothing or the file failed,
+        in which case `error` holds the message.
+        Files already in the run journal or the cache are returned without being
+        extracted again; every other completed file is checkpointed to the journal.
+        Stops early (without yielding the remaining files) once should_stop() is True.
+        """
+        should_stop = should_stop or (lambda: False)
+        preload_ocr = self._needs_ocr(pdf_files)
+        if self.workers == 1 or self.daemon is not None or self.profiler is not None:
+            yield from self._imap_inline(pdf_files, should_stop, preload_ocr)
+        else:
+            yield from self._imap_pool(pdf_files, should_stop, preload_ocr)
+
+    def _needs_ocr(self, pdf_files: List[str]) -> bool:
+        """
+        Pre-scans the files that will be extracted; True when the OCR model should be loaded up front.
+        Journal and cache hits are never extracted, so they are not opened either.
+        """
+        self._lookups = {}
+        if not self.prescan or self.daemon is not None:
+            return False
+        from src.extractor import prescan_pdfs
+
+        misses = []
+        for pdf_path in pdf_files:
+            if self._journaled(pdf_path) is not None:
+                continue
+            self._lookups[pdf_path] = self._lookup(pdf_path)
+            if self._lookups[pdf_path][1] is None:
+                misses.append(pdf_path)
+        if not misses:
+            return False
+        digital, scanned = prescan_pdfs(misses)
+        logger.info(f"Pre-scan: {digital} digital, {scanned} scanned PDF(s).")
+        return scanned > 0
+
+    def _lookup(self, pdf_path: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Returns (content_hash, cached data) - both None when caching is off or unavailable."""
+        if self.cache is None:
+            return None, None
+        if pdf_path in self._lookups:
+            return self._lookups.pop(pdf_path)
+        try:
+            content_hash = file_hash(pdf_path)
+        except OSError:
+            return None, None
+        hit = self.cache.get(content_hash)
+        return content_hash, (hit[1] if hit else None)
+
+    def _store(self, content_hash: Optional[str], elements, data):
+        if self.cache is not None and content_hash and data:
+            self.cache.put(content_hash, elements, data)
+
+    def _journaled(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        return self.journal.lookup(pdf_path) if self.journal is not None else None
+
+    def _checkpoint(self, pdf_path: str, data):
+        if self.journal is not None:
+            self.journal.record(pdf_path, data)
+
+    def _imap_inline(self, pdf_files, should_stop, preload_ocr):
+        from src.extractor import PDFExtractor, warm_ocr_reader
+        from src.parser import InvoiceParser
+
+        # Built on the first cache miss, so a fully cached re-run never loads the OCR model
+        extractor = parser = None
+
+        for i, pdf_path in enumerate(pdf_files, start=1):
+            if should_stop():
+                break
+            try:
+                entry = self._journaled(pdf_path)
+                if entry is not None:
+                    metrics.incr("files.resumed")
+                    yield i, pdf_path, entry["data"], None
+                    continue
+
+                content_hash, data = self._lookup(pdf_path)
+                if data is not None:
+                    metrics.incr("files.cached")
+                else:
+                    if parser is None:
+                        extractor, parser = self.daemon or PDFExtractor(), InvoiceParser()
+                        # Otherwise the model loads on the first scanned page; warming overlaps it with digital files
+                        if preload_ocr:
+                            warm_ocr_reader()
+                    # Elements are only collected when the cache will store them
+                    keep_elements = self.cache is not None
+                    if self.profiler is not None:
+                        elements, data = self.profiler.run(pdf_path, process_file, extractor, parser, pdf_path,
+                                                           keep_elements=keep_elements)
+                    else:
+                        elements, data = process_file(extractor, parser, pdf_path, keep_elements=keep_elements)
+                    self._store(content_hash, elements, data)
+                self._checkpoint(pdf_path, data)
+                yield i, pdf_path, data, None
+            except Exception as e:
+                yield i, pdf_path, None, str(e)
+
+    def _imap_pool(self, pdf_files, should_stop, preload_ocr):
+        logger.info(f"Starting extraction pool with {self.workers} worker processes...")
+
+        # spawn keeps torch/OpenMP state out of the children and matches Windows behaviour
+        ctx = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                       initializer=_init_worker, initargs=(preload_ocr,))
+        queued = iter(enumerate(pdf_files, start=1))
+        # Keep a bounded window of in-flight files so results can be drained in order
+        pending = deque()
+        stopped = False
+
+        def submit_next():
+            for i, pdf_path in queued:
+                entry = self._journaled(pdf_path)
+                content_hash, data = (None, entry["data"]) if entry is not None else self._lookup(pdf_path)
+                if entry is not None or data is not None:
+                    metrics.incr("files.resumed" if entry is not None else "files.cached")
+                    # Journal/cache hit: queue an already-completed future to keep the ordering logic uniform
+                    future = Future()
+                    future.set_result((None, data, None))
+                else:
+                    future = executor.submit(_process_in_worker, pdf_path, self.cache is not None)
+                pending.append((i, pdf_path, content_hash, future, entry is not None))
+                return
+
+        try:
+            for _ in range(self.workers * 2):
+                submit_next()
+
+            while pending:
+                i, pdf_path, content_hash, future, journaled = pending.popleft()
+
+                # Poll so a stop request is honoured while waiting on a slow file
+                while True:
+                    if should_stop():
+                        stopped = True
+                        return
+                    try:
+                        elements, data, stats = future.result(timeout=0.2)
+                        metrics.merge(stats)
+                        error = None
+                        if elements is not None:
+                            self._store(content_hash, elements, data)
+                        if not journaled:
+                            self._checkpoint(pdf_path, data)
+                        break
+                    except FutureTimeout:
+                        continue
+                    except Exception as e:
+                        data, error = None, str(e)
+                        break
+
+                submit_next()
+                yield i, pdf_path, data, error
+        finally:
+            # On stop, drop queued files and let in-flight ones finish in the background
+            executor.shutdown(wait=not stopped, cancel_futures=True)
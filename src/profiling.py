@@ -0,0 +1,85 @@
+import os
+import io
+import time
+import heapq
+import pstats
+import cProfile
+from typing import List, Tuple, Callable, Any, Optional
+from loguru import logger
+
+from src.config import PROFILE_TOP_N, PROFILE_KEEP_SLOWEST
+
+
+class FileProfiler:
+    """
+    Profiles extraction + parsing of each file with cProfile.
+    Every file's stats are folded into one aggregate; the .prof dumps of only the
+    `keep_slowest` slowest files are kept on disk for inspection (snakeviz, pstats).
+    """
+
+    def __init__(self, output_dir: str, top_n: int = PROFILE_TOP_N, keep_slowest: int = PROFILE_KEEP_SLOWEST):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.keep_slowest = max(1, keep_slowest)
+        self.aggregate: Optional[pstats.Stats] = None
+        self.files = 0
+        # Min-heap of (seconds, pdf_path, prof_path): the fastest kept file is evicted first
+        self._slowest: List[Tuple[float, str, str]] = []
+        os.makedirs(output_dir, exist_ok=True)
+        # Profiles from an earlier run would be mistaken for this one's
+        for name in os.listdir(output_dir):
+            if name.endswith(".prof") or name == "hotspots.txt":
+                os.remove(os.path.join(output_dir, name))
+
+    def run(self, pdf_path: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            self._record(pdf_path, profile, time.perf_counter() - start)
+
+    def _record(self, pdf_path: str, profile: cProfile.Profile, seconds: float):
+        self.files += 1
+        if self.aggregate is None:
+            self.aggregate = pstats.Stats(profile)
+        else:
+            self.aggregate.add(profile)
+
+        if len(self._slowest) >= self.keep_slowest and seconds <= self._slowest[0][0]:
+            return
+        prof_path = os.path.join(self.output_dir, f"{self.files:05d}_{os.path.basename(pdf_path)}.prof")
+        profile.dump_stats(prof_path)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, (seconds, pdf_path, prof_path))
+        else:
+            _, _, evicted = heapq.heappushpop(self._slowest, (seconds, pdf_path, prof_path))
+            try:
+                os.remove(evicted)
+            except OSError:
+                pass
+
+    def report(self) -> Optional[str]:
+        """
+        Writes hotspots.txt (top-N functions by own and cumulative time, plus the
+        slowest files) and hotspots.prof (the aggregate). Returns the report path.
+        """
+        if self.aggregate is None:
+            return None
+
+        self.aggregate.dump_stats(os.path.join(self.output_dir, "hotspots.prof"))
+        buf = io.StringIO()
+        buf.write(f"Profiled {self.files} file(s)\n\nSlowest files:\n")
+        for seconds, pdf_path, prof_path in sorted(self._slowest, reverse=True):
+            buf.write(f"  {seconds:8.3f}s  {os.path.basename(pdf_path)}  ->  {os.path.basename(prof_path)}\n")
+
+        for sort_key, title in (("tottime", "own time"), ("cumulative", "cumulative time")):
+            buf.write(f"\nTop {self.top_n} functions by {title}:\n")
+            self.aggregate.stream = buf
+            self.aggregate.sort_stats(sort_key).print_stats(self.top_n)
+
+        report_path = os.path.join(self.output_dir, "hotspots.txt")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+        logger.info(f"Profile report written to {report_path}")
+        return report_path
@@ -0,0 +1,175 @@
+import re
+import bisect
+import datetime
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+# Short field names accepted in scoped queries (country:CN, total>1000)
+FIELD_ALIASES: Dict[str, List[str]] = {
+    "id": ["id"],
+    "file": ["filename"],
+    "filename": ["filename"],
+    "invoice": ["Invoice Number"],
+    "waybill": ["Waybill Number"],
+    "awb": ["Waybill Number"],
+    "country": ["Country of Origin", "Exporting Country"],
+    "origin": ["Country of Origin"],
+    "exporting": ["Exporting Country"],
+    "date": ["Summary Date", "Entry Date", "Import Date", "Export Date"],
+    "summary": ["Summary Date"],
+    "entry": ["Entry Date"],
+    "import": ["Import Date"],
+    "export": ["Export Date"],
+    "duty": ["Duty"],
+    "tax": ["Tax"],
+    "other": ["Other"],
+    "total": ["Total"],
+    "value": ["Total Entered Value"],
+    "entered": ["Total Entered Value"],
+}
+DATE_FIELDS = {"Summary Date", "Entry Date", "Import Date", "Export Date"}
+
+# field, operator, value  /  "quoted phrase"  /  bare word
+_TERM_RE = re.compile(r'(?P<field>\w+)(?P<op>>=|<=|>|<|=|:)(?P<value>"[^"]*"|\S+)|"(?P<phrase>[^"]*)"|(?P<word>\S+)')
+_US_DATE_RE = re.compile(r"(\d{1,2})[\/\.\-](\d{1,2})[\/\.\-](\d{2,4})")
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_NGRAM = 3
+
+
+def _ordinal(value: str, field: str) -> Optional[float]:
+    """Comparable number for a cell: amounts as floats, dates as day ordinals."""
+    text = value.strip()
+    if field in DATE_FIELDS:
+        m = _ISO_DATE_RE.fullmatch(text)
+        if m:
+            year, month, day = (int(g) for g in m.groups())
+        else:
+            m = _US_DATE_RE.fullmatch(text)
+            if not m:
+                return None
+            month, day, year = (int(g) for g in m.groups())
+            if year < 100:
+                year += 1900 if year >= 69 else 2000
+        try:
+            return float(datetime.date(year, month, day).toordinal())
+        except ValueError:
+            return None
+    try:
+        return float(text.replace(",", "").replace("$", ""))
+    except ValueError:
+        return None
+
+
+class SearchIndex:
+    """
+    Incremental search index over the results rows.
+    Free text uses trigram postings (candidates are verified, so matching is plain
+    case-insensitive substring as before); numeric/date comparisons use per-field
+    sorted lists. Queries return the matching row ids only.
+    """
+
+    def __init__(self):
+        self._rows: List[Dict[str, str]] = []  # row id -> {column: lowercase text}
+        self._grams: Dict[str, Set[int]] = defaultdict(set)
+        self._sorted: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+
+    def clear(self):
+        self.__init__()
+
+    def add(self, row_id: int, record: Dict[str, Any]):
+        """Indexes one row; row ids are expected to arrive in order (0, 1, 2, ...)."""
+        cells = {k: ("" if v is None else str(v)).lower() for k, v in record.items()}
+        while len(self._rows) <= row_id:
+            self._rows.append({})
+        self._rows[row_id] = cells
+
+        for column, text in cells.items():
+            for i in range(len(text) - _NGRAM + 1):
+                self._grams[text[i:i + _NGRAM]].add(row_id)
+            number = _ordinal(text, column)
+            if number is not None:
+                bisect.insort(self._sorted[column], (number, row_id))
+
+    def search(self, query: str) -> Optional[Set[int]]:
+        """
+        Returns the ids of rows matching every term of the query, or None for an empty query.
+        Terms: bare words or "quoted phrases" (substring of any field), field:text
+        (substring of that field), field=text (exact), field>N / >= / < / <= (numbers, dates).
+        """
+        query = query.strip()
+        if not query:
+            return None
+
+        result: Optional[Set[int]] = None
+        for m in _TERM_RE.finditer(query):
+            if m.group("field") is not None:
+                value = m.group("value").strip('"')
+                matches = self._match_field(m.group("field"), m.group("op"), value)
+            else:
+                matches = self._match_text(m.group("phrase") if m.group("phrase") is not None else m.group("word"))
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result if result is not None else set()
+
+    def _columns_for(self, field: str) -> List[str]:
+        key = field.lower()
+        if key in FIELD_ALIASES:
+            return FIELD_ALIASES[key]
+        # Also accept full column names written without spaces ("invoicenumber", "totalenteredvalue")
+        compact = key.replace(" ", "")
+        columns = {c for row in self._rows[:1] for c in row}
+        return [c for c in columns if c.lower().replace(" ", "") == compact]
+
+    def _candidates(self, text: str) -> Set[int]:
+        """Rows that may contain `text` (every row for terms shorter than one n-gram)."""
+        if len(text) < _NGRAM:
+            return set(range(len(self._rows)))
+        grams = [text[i:i + _NGRAM] for i in range(len(text) - _NGRAM + 1)]
+        postings = sorted((self._grams.get(g, set()) for g in set(grams)), key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates &= p
+            if not candidates:
+                break
+        return candidates
+
+    def _match_text(self, text: str, columns: Optional[List[str]] = None) -> Set[int]:
+        text = text.lower()
+        matches = set()
+        for row_id in self._candidates(text):
+            cells = self._rows[row_id]
+            values = cells.values() if columns is None else (cells.get(c, "") for c in columns)
+            if any(text in v for v in values):
+                matches.add(row_id)
+        return matches
+
+    def _match_field(self, field: str, op: str, value: str) -> Set[int]:
+        columns = self._columns_for(field)
+        if not columns:
+            # Unknown field: treat the whole term as free text (e.g. a time like 10:30)
+            return self._match_text(f"{field}{op}{value}")
+
+        if op == ":":
+            return self._match_text(value, columns)
+        if op == "=":
+            value = value.lower()
+            return {row_id for row_id in self._candidates(value)
+                    if any(self._rows[row_id].get(c, "") == value for c in columns)}
+
+        matches = set()
+        for column in columns:
+            bound = _ordinal(value, column)
+            if bound is None:
+                continue
+            entries = self._sorted.get(column, [])
+            if op == ">":
+                start, stop = bisect.bisect_right(entries, (bound, float("inf"))), len(entries)
+            elif op == ">=":
+                start, stop = bisect.bisect_left(entries, (bound, -1)), len(entries)
+            elif op == "<":
+                start, stop = 0, bisect.bisect_left(entries, (bound, -1))
+            else:  # "<="
+                start, stop = 0, bisect.bisect_right(entries, (bound, float("inf")))
+            matches.update(row_id for _, row_id in entries[start:stop])
+        return matches
@@ -0,0 +1,207 @@
+import re
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Field -> (box label pattern, value pattern). Labels carry their CBP 7501 box number.
+_DATE = r"\d{1,2}[\/\.\-]\d{1,2}[\/\.\-]\d{2,4}"
+_AMOUNT = r"[\d,]*\d\.\d{2}"
+SPATIAL_FIELDS: Dict[str, Tuple[str, str]] = {
+    "Summary Date": (r"3\.?\s*Summary\s*Date", _DATE),
+    "Entry Date": (r"7\.?\s*Entry\s*Date", _DATE),
+    "Import Date": (r"11\.?\s*Import\s*Date", _DATE),
+    "Export Date": (r"15\.?\s*Export\s*Date", _DATE),
+    "Country of Origin": (r"10\.?\s*Country\s*of\s*Origin", r"[A-Z]{2}|MULTI"),
+    "Exporting Country": (r"14\.?\s*Exporting\s*Country", r"[A-Z]{2}|MULTI"),
+    "Waybill Number": (r"12\.?\s*B\s*/?\s*L\s*or\s*AWB(?:\s*No\.?)?", r"\d{3}-\d{7,10}"),
+    "Total Entered Value": (r"35\.?\s*Total\s*Entered\s*Value", r"\$?[\d,]{3,12}(?:\.\d{2})?"),
+    "Duty": (r"37\.?\s*Duty", _AMOUNT),
+    "Tax": (r"38\.?\s*Tax", _AMOUNT),
+    "Other": (r"39\.?\s*Other", _AMOUNT),
+    "Total": (r"40\.?\s*Total", _AMOUNT),
+}
+
+# All labels in one alternation so every line is scanned once; group names map back to fields
+_GROUP_TO_FIELD = {f"f{i}": field for i, field in enumerate(SPATIAL_FIELDS)}
+_LABELS_RE = re.compile(
+    "|".join(rf"(?P<f{i}>\b{label})" for i, (label, _) in enumerate(SPATIAL_FIELDS.values())),
+    re.IGNORECASE)
+_VALUE_RES = {field: re.compile(rf"(?<![\w/\.\-])({value})(?![\w/\-]|\.\d)")
+              for field, (_, value) in SPATIAL_FIELDS.items()}
+
+# How far (in label heights) to look to the right of and below a label for its value
+_RIGHT_REACH = 15.0
+_BELOW_REACH = 4.0
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the elements of one page.
+    Rectangle queries only visit the cells they overlap instead of every element.
+    """
+
+    def __init__(self, elements: List[Dict[str, Any]], cell_size: float):
+        self.elements = elements
+        self.cell_size = max(cell_size, 1.0)
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, e in enumerate(elements):
+            for cell in self._cells_for(e['x'], e['y'], e['x'] + e['w'], e['y'] + e['h']):
+                self.cells[cell].append(i)
+
+    def _cells_for(self, x0: float, y0: float, x1: float, y1: float):
+        c = self.cell_size
+        for cx in range(int(x0 // c), int(x1 // c) + 1):
+            for cy in range(int(y0 // c), int(y1 // c) + 1):
+                yield cx, cy
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[Dict[str, Any]]:
+        """Elements whose box intersects the rectangle."""
+        seen = set()
+        found = []
+        for cell in self._cells_for(x0, y0, x1, y1):
+            for i in self.cells.get(cell, ()):
+                if i in seen:
+                    continue
+                seen.add(i)
+                e = self.elements[i]
+                if e['x'] < x1 and e['x'] + e['w'] > x0 and e['y'] < y1 and e['y'] + e['h'] > y0:
+                    found.append(e)
+        return found
+
+
+class SpatialResolver:
+    """
+    Resolves CBP 7501 fields from element geometry: each label is located once,
+    then its value is the nearest matching element to the right of or below it.
+    """
+
+    def resolve(self, elements: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """
+        Returns (data, sources). Only fields that were resolved spatially are present;
+        sources maps each of them to the box it was read from: {"page", "x", "y", "w", "h", "text"}.
+        """
+        pages: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for e in elements:
+            pages[e['page']].append(e)
+
+        data: Dict[str, str] = {}
+        sources: Dict[str, Dict[str, Any]] = {}
+        for page_num in sorted(pages):
+            page_elements = pages[page_num]
+            labels = self._find_labels(page_elements)
+            if not labels:
+                continue
+
+            index = SpatialIndex(page_elements, cell_size=self._cell_size(page_elements))
+            for field, occurrences in labels.items():
+                if field in data:
+                    continue
+                for label_box, label_elements, tail in occurrences:
+                    found = self._resolve_value(field, index, label_box, label_elements, tail)
+                    if found:
+                        value, source = found
+                        data[field] = value
+                        sources[field] = {"page": page_num, "x": source['x'], "y": source['y'],
+                                          "w": source['w'], "h": source['h'], "text": source['text']}
+                        break
+            if len(data) == len(SPATIAL_FIELDS):
+                break
+        return data, sources
+
+    def _cell_size(self, elements: List[Dict[str, Any]]) -> float:
+        heights = sorted(e['h'] for e in elements if e['h'] > 0)
+        median = heights[len(heights) // 2] if heights else 10.0
+        return median * 4
+
+    def _group_lines(self, elements: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Groups elements whose vertical centres line up, each line ordered left to right."""
+        ordered = sorted(elements, key=lambda e: (e['y'] + e['h'] / 2, e['x']))
+        lines = []
+        current, current_mid, current_h = [], None, 0.0
+        for e in ordered:
+            mid = e['y'] + e['h'] / 2
+            if current and abs(mid - current_mid) <= max(e['h'], current_h) * 0.5:
+                current.append(e)
+            else:
+                if current:
+                    lines.append(sorted(current, key=lambda el: el['x']))
+                current, current_mid, current_h = [e], mid, e['h']
+        if current:
+            lines.append(sorted(current, key=lambda el: el['x']))
+        return lines
+
+    def _find_labels(self, elements: List[Dict[str, Any]]) -> Dict[str, List[Tuple]]:
+        """
+        One scan over the page's lines for every field label.
+        Returns field -> [(label_box, label_elements, tail_text)] in reading order, where
+        tail_text is whatever follows the label inside its last element (OCR often
+        returns "10. Country of Origin CN" as a single box).
+        """
+        labels: Dict[str, List[Tuple]] = defaultdict(list)
+        for line in self._group_lines(elements):
+            parts, offsets, pos = [], [], 0
+            for e in line:
+                parts.append(e['text'])
+                offsets.append((pos, pos + len(e['text'])))
+                pos += len(e['text']) + 1
+            line_text = " ".join(parts)
+
+            for m in _LABELS_RE.finditer(line_text):
+                field = _GROUP_TO_FIELD[m.lastgroup]
+                span = [(e, off) for e, off in zip(line, offsets) if off[0] < m.end() and off[1] > m.start()]
+                label_elements = [e for e, _ in span]
+                last_end = span[-1][1][1]
+                box = (min(e['x'] for e in label_elements),
+                       min(e['y'] for e in label_elements),
+                       max(e['x'] + e['w'] for e in label_elements),
+                       max(e['y'] + e['h'] for e in label_elements))
+                labels[field].append((box, label_elements, line_text[m.end():last_end]))
+        return labels
+
+    def _resolve_value(self, field: str, index: SpatialIndex, label_box: Tuple[float, float, float, float],
+                       label_elements: List[Dict[str, Any]], tail: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        value_re = _VALUE_RES[field]
+
+        # Value printed in the same OCR box as its label
+        m = value_re.search(tail)
+        if m and self._accept(field, m.group(1)):
+            return self._clean(field, m.group(1)), label_elements[-1]
+
+        x0, y0, x1, y1 = label_box
+        unit = max(y1 - y0, 1.0)
+        label_ids = {id(e) for e in label_elements}
+
+        best = None
+        # Right of the label, on the same band
+        for e in index.query(x1, y0 - unit * 0.5, x1 + unit * _RIGHT_REACH, y1 + unit * 0.5):
+            if id(e) in label_ids or e['x'] < x1 - unit * 0.25:
+                continue
+            distance = (e['x'] - x1) + abs(e['y'] - y0)
+            best = self._closer(field, value_re, e, distance, best)
+        # Below the label, roughly within its column
+        for e in index.query(x0 - unit, y1, x1 + unit * _RIGHT_REACH / 2, y1 + unit * _BELOW_REACH):
+            if id(e) in label_ids or e['y'] < y1 - unit * 0.25:
+                continue
+            distance = (e['y'] - y1) + abs(e['x'] - x0) * 0.5
+            best = self._closer(field, value_re, e, distance, best)
+
+        if best is None:
+            return None
+        _, value, element = best
+        return self._clean(field, value), element
+
+    def _closer(self, field, value_re, element, distance, best):
+        m = value_re.search(element['text'])
+        if not m or not self._accept(field, m.group(1)):
+            return best
+        if best is None or distance < best[0]:
+            return distance, m.group(1), element
+        return best
+
+    def _accept(self, field: str, value: str) -> bool:
+        # "499" is the printed form number near box 35, never the entered value
+        return not (field == "Total Entered Value" and value.replace(",", "").replace("$", "").strip() == "499")
+
+    def _clean(self, field: str, value: str) -> str:
+        if field in ("Total Entered Value", "Duty", "Tax", "Other", "Total"):
+            return value.replace(",", "").replace("$", "").strip()
+        return value.strip()
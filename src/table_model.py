@@ -0,0 +1,114 @@
+from typing import List, Dict, Any, Iterator, Optional, Set
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+# Role carrying a type-aware sort key (numbers sort numerically, text case-insensitively)
+SORT_ROLE = Qt.UserRole + 1
+
+
+class InvoiceTableModel(QAbstractTableModel):
+    """
+    Results grid model backed by a compact row store: one tuple of values per invoice,
+    aligned to the column list. Qt only asks for the cells that are actually visible.
+    """
+
+    def __init__(self, columns: List[str], parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self._rows: List[tuple] = []
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        # Rows stored before a column was added are shorter than the header
+        value = row[index.column()] if index.column() < len(row) else None
+        if role == Qt.DisplayRole:
+            return "" if value is None else str(value)
+        if role == SORT_ROLE:
+            return self._sort_key(value)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            # Nicer headers
+            return self._columns[section].replace("_", " ").title()
+        return None
+
+    @staticmethod
+    def _sort_key(value: Any) -> tuple:
+        text = "" if value is None else str(value)
+        try:
+            return (0, float(text.replace(",", "").replace("$", "")), "")
+        except ValueError:
+            return (1, 0.0, text.lower())
+
+    # --- Row store ---
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def append_records(self, records: List[Dict[str, Any]]):
+        """Appends a batch of records with a single row-insertion notification."""
+        if not records:
+            return
+
+        # Update Columns if new keys found
+        new_keys = []
+        for record in records:
+            new_keys.extend(k for k in record if k not in self._columns and k not in new_keys)
+        if new_keys:
+            first_col = len(self._columns)
+            self.beginInsertColumns(QModelIndex(), first_col, first_col + len(new_keys) - 1)
+            self._columns.extend(new_keys)
+            self.endInsertColumns()
+
+        first_row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(records) - 1)
+        self._rows.extend(tuple(record.get(c) for c in self._columns) for record in records)
+        self.endInsertRows()
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return {c: v for c, v in zip(self._columns, self._rows[row]) if v is not None}
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self._rows)):
+            yield self.record(row)
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self.iter_records())
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+
+class InvoiceProxyModel(QSortFilterProxyModel):
+    """
+    Sorting/filtering layer over InvoiceTableModel; the source rows are never touched.
+    Filtering is driven by a precomputed set of matching source rows (see src.search).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self._allowed_rows: Optional[Set[int]] = None
+
+    def set_row_filter(self, rows: Optional[Set[int]]):
+        """Shows only the given source rows (None shows everything)."""
+        self._allowed_rows = rows
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self._allowed_rows is None or source_row in self._allowed_rows
+
+    def lessThan(self, left, right):
+        return left.data(SORT_ROLE) < right.data(SORT_ROLE)
@@ -0,0 +1,252 @@
+import os
+import csv
+import json
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Tuple, Callable, Iterator, Optional
+from loguru import logger
+
+from src.config import WATCH_POLL_SECONDS, WATCH_SETTLE_SECONDS
+
+# (size, mtime_ns) of a file when it was last seen
+Signature = Tuple[int, int]
+
+
+class FolderWatcher:
+    """
+    Polls a folder for new or changed PDFs.
+    A file is reported once its size and mtime have stayed the same for `settle_seconds`
+    (so half-copied files are skipped), and again only if it changes afterwards.
+    Polling stat() is portable across local disks and network shares, where inotify
+    and similar notifications are unreliable.
+    """
+
+    def __init__(self, folder: str, poll_seconds: float = WATCH_POLL_SECONDS,
+                 settle_seconds: float = WATCH_SETTLE_SECONDS, processed: Optional[Dict[str, Signature]] = None):
+        self.folder = folder
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        # Seeded from a WatchState, so files handled by an earlier session are not reported again
+        self.processed: Dict[str, Signature] = dict(processed or {})
+        # path -> (signature, monotonic time it was first seen with that signature)
+        self.pending: Dict[str, Tuple[Signature, float]] = {}
+        # Only files already there when watching starts may skip the settle wait
+        self._initial_scan = True
+
+    def _scan(self) -> Dict[str, Signature]:
+        found = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".pdf"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue  # deleted between listing and stat
+                    if entry.is_file():
+                        found[entry.path] = (st.st_size, st.st_mtime_ns)
+        except OSError as e:
+            logger.warning(f"Cannot scan {self.folder}: {e}")
+        return found
+
+    def poll(self) -> List[str]:
+        """
+        One scan. Returns the files that became ready since the last call, sorted by name.
+        """
+        now = time.monotonic()
+        wall_now_ns = time.time_ns()
+        settle_ns = int(self.settle_seconds * 1e9)
+        current = self._scan()
+        ready = []
+
+        for path, sig in current.items():
+            if self.processed.get(path) == sig:
+                continue
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != sig:
+                # Present at start-up and untouched for the settle period: no need to wait.
+                # Later arrivals always wait, since share clocks and copied mtimes are not trustworthy
+                if self._initial_scan and sig[0] > 0 and wall_now_ns - sig[1] >= settle_ns:
+                    ready.append(path)
+                else:
+                    self.pending[path] = (sig, now)
+            elif sig[0] > 0 and now - seen[1] >= self.settle_seconds:
+                ready.append(path)
+
+        for path in list(self.pending):
+            if path not in current or path in ready:
+                del self.pending[path]
+        for path in ready:
+            self.processed[path] = current[path]
+        self._initial_scan = False
+        return sorted(ready)
+
+    def watch(self, should_stop: Optional[Callable[[], bool]] = None) -> Iterator[List[str]]:
+        """
+        Yields each non-empty batch of ready files until should_stop() is True.
+        """
+        should_stop = should_stop or (lambda: False)
+        logger.info(f"Watching {self.folder} for new PDFs (poll every {self.poll_seconds}s)...")
+        while not should_stop():
+            ready = self.poll()
+            if ready:
+                yield ready
+                continue
+            # Sleep in short steps so a stop request is noticed quickly
+            deadline = time.monotonic() + self.poll_seconds
+            while time.monotonic() < deadline and not should_stop():
+                time.sleep(min(0.2, self.poll_seconds))
+
+
+def open_batch_writer(exporter, output_path: str):
+    """
+    Writer for one watch-mode batch. csv/jsonl append to the consolidated output;
+    xlsx/parquet cannot be appended without a rewrite, so each batch gets its own
+    timestamped part file next to it (consolidated_invoices.20240101-120000-123456.xlsx).
+    """
+    writer = exporter.open_stream(output_path, append=True)
+    if writer.appendable:
+        return writer
+    stem, ext = os.path.splitext(output_path)
+    stamp = f"{datetime.now():%Y%m%d-%H%M%S-%f}"
+    part_path = f"{stem}.{stamp}{ext}"
+    # Batches can follow each other within the same clock tick; never overwrite an earlier part
+    suffix = 1
+    while os.path.exists(part_path):
+        part_path = f"{stem}.{stamp}-{suffix}{ext}"
+        suffix += 1
+    return exporter.open_stream(part_path)
+
+
+class WatchState:
+    """
+    What watch mode has exported so far, kept in a JSON sidecar next to the output
+    (.consolidated_invoices.csv.watch.json) so a restarted session neither re-exports
+    files it already handled nor reuses their ids.
+    files: filename -> {"signature": [size, mtime_ns], "id": int, "output": file holding its row}
+    """
+
+    def __init__(self, output_path: str):
+        folder, name = os.path.split(output_path)
+        self.path = os.path.join(folder, f".{name}.watch.json")
+        self.next_id = 1
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable watch state {self.path}: {e}")
+            return
+        self.next_id = state.get("next_id", 1)
+        # Rows whose output file was deleted since are gone, so those files are exported again
+        self.files = {name: entry for name, entry in state.get("files", {}).items()
+                      if entry.get("output") is None or os.path.exists(entry["output"])}
+        if self.files:
+            logger.info(f"Watch state: {len(self.files)} file(s) already handled, next id {self.next_id}.")
+
+    def signatures(self, folder: str) -> Dict[str, Signature]:
+        """Seed for FolderWatcher.processed."""
+        return {os.path.join(folder, name): tuple(entry["signature"]) for name, entry in self.files.items()}
+
+    def replace(self, batch: List[str]):
+        """
+        Forgets files of the batch handled before (they were edited since) and removes
+        their earlier rows from the output, so the new row replaces the stale one.
+        """
+        changed = False
+        for pdf_path in batch:
+            entry = self.files.pop(os.path.basename(pdf_path), None)
+            if entry is None:
+                continue
+            changed = True
+            if entry.get("output") and os.path.exists(entry["output"]):
+                drop_rows(entry["output"], os.path.basename(pdf_path))
+        if changed:
+            self.save()
+
+    def record(self, results: List[Tuple[str, Dict[str, Any]]], signatures: Dict[str, Signature],
+               output_path: str):
+        """
+        Records a finished batch: (pdf_path, pipeline stats) per file, the signatures the
+        watcher saw and the file the batch was written to.
+        """
+        for pdf_path, stats in results:
+            sig = signatures.get(pdf_path)
+            if sig is None:
+                continue
+            self.files[os.path.basename(pdf_path)] = {
+                "signature": list(sig), "id": stats["id"],
+                "output": output_path if stats["written"] else None,
+            }
+            self.next_id = max(self.next_id, stats["id"] + 1)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"next_id": self.next_id, "files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def drop_rows(output_path: str, filename: str):
+    """
+    Removes the rows exported for `filename` from a csv/jsonl/xlsx/parquet output.
+    A part file left with no rows is deleted.
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    tmp_path = output_path + ".tmp"
+    if ext == ".csv":
+        with open(output_path, newline="", encoding="utf-8") as src:
+            rows = list(csv.reader(src))
+        if not rows or "filename" not in rows[0]:
+            return
+        col = rows[0].index("filename")
+        with open(tmp_path, "w", newline="", encoding="utf-8") as dst:
+            csv.writer(dst).writerows([rows[0]] + [r for r in rows[1:] if len(r) <= col or r[col] != filename])
+        os.replace(tmp_path, output_path)
+    elif ext == ".jsonl":
+        with open(output_path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+            for line in src:
+                try:
+                    if json.loads(line).get("filename") == filename:
+                        continue
+                except ValueError:
+                    pass
+                dst.write(line)
+        os.replace(tmp_path, output_path)
+    elif ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(output_path)
+        sheet = workbook.active
+        header = [cell.value for cell in sheet[1]]
+        if "filename" not in header:
+            return
+        col = header.index("filename") + 1
+        # Bottom-up so deleting a row does not shift the ones still to check
+        for row in range(sheet.max_row, 1, -1):
+            if sheet.cell(row=row, column=col).value == filename:
+                sheet.delete_rows(row)
+        if sheet.max_row <= 1:
+            os.remove(output_path)
+        else:
+            workbook.save(output_path)
+    elif ext == ".parquet":
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(output_path)
+        if "filename" not in table.column_names:
+            return
+        table = table.filter(pc.fill_null(pc.not_equal(table["filename"], filename), True))
+        if table.num_rows == 0:
+            os.remove(output_path)
+        else:
+            pq.write_table(table, output_path)